@@ -1,10 +1,21 @@
 from django.urls import path
 
+from core.middleware import query_budget
+from core.routers import use_replica
+
 from . import views
 
 app_name = 'about'
 
 urlpatterns = [
-    path('author/', views.AboutAuthorView.as_view(), name='author'),
-    path('tech/', views.AboutTechView.as_view(), name='tech'),
+    path(
+        'author/',
+        use_replica(query_budget(2)(views.AboutAuthorView.as_view())),
+        name='author',
+    ),
+    path(
+        'tech/',
+        use_replica(query_budget(2)(views.AboutTechView.as_view())),
+        name='tech',
+    ),
 ]
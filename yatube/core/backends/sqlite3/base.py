@@ -0,0 +1,51 @@
+from django.db.backends.sqlite3 import base
+
+from core.pool import PoolExhausted, get_pool
+
+Database = base.Database
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    SQLite, открывающий транзакции через BEGIN IMMEDIATE.
+    Отложенная транзакция, начавшая с чтения, при попытке записи
+    после чужого коммита сразу получает "database is locked" без
+    ожидания busy_timeout. Немедленная транзакция берёт блокировку
+    записи в начале и ждёт её вместе с busy_timeout.
+
+    Если в настройках базы задан POOL, соединения берутся из
+    ограниченного пула core.pool и возвращаются в него при закрытии.
+    """
+
+    pool = None
+    connection_reused = False
+
+    def get_new_connection(self, conn_params):
+        pool = get_pool(self.alias, self.settings_dict)
+        if pool is None or self.is_in_memory_db():
+            self.connection_reused = False
+            return super().get_new_connection(conn_params)
+        try:
+            connection, self.connection_reused = pool.acquire(
+                lambda: super(DatabaseWrapper, self).get_new_connection(
+                    conn_params))
+        except PoolExhausted as exc:
+            raise Database.OperationalError(str(exc)) from exc
+        self.pool = pool
+        return connection
+
+    def _close(self):
+        pool, self.pool = self.pool, None
+        if pool is None or self.connection is None:
+            return super()._close()
+        connection = self.connection
+        reusable = True
+        try:
+            if connection.in_transaction:
+                connection.rollback()
+        except Database.Error:
+            reusable = False
+        pool.release(connection, reusable)
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN IMMEDIATE')
@@ -0,0 +1,269 @@
+import copy
+import logging
+import os
+import pickle
+import smtplib
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+logger = logging.getLogger(__name__)
+
+SPOOL_STATES = ('tmp', 'new', 'cur', 'failed')
+
+
+class MailSpool:
+    """
+    Очередь писем в каталоге по образцу Maildir. Письмо записывается
+    в tmp и атомарно переносится в new, поэтому обработчик не видит
+    недописанных файлов, а принятое письмо переживает перезапуск.
+    Имя файла начинается со времени, раньше которого письмо не
+    отправляется. Обработчик забирает письмо переносом в cur, так что
+    несколько обработчиков не отправят его дважды; письма, для которых
+    исчерпаны попытки, переносятся в failed.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        for state in SPOOL_STATES:
+            os.makedirs(self.path(state), exist_ok=True)
+
+    def path(self, state, name=''):
+        return os.path.join(self.directory, state, name)
+
+    def put(self, message, attempts=0, not_before=None):
+        """Записывает письмо в очередь и возвращает имя его файла."""
+        if not_before is None:
+            not_before = time.time()
+        message = copy.copy(message)
+        message.connection = None
+        name = f'{int(not_before * 1000):015d}-{uuid.uuid4().hex}.msg'
+        with open(self.path('tmp', name), 'wb') as file:
+            pickle.dump({'message': message, 'attempts': attempts}, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(self.path('tmp', name), self.path('new', name))
+        return name
+
+    def due(self, limit, now=None):
+        """Имена писем, время отправки которых наступило, по порядку."""
+        deadline = int((time.time() if now is None else now) * 1000)
+        names = sorted(os.listdir(self.path('new')))
+        return [
+            name for name in names
+            if int(name.split('-', 1)[0]) <= deadline
+        ][:limit]
+
+    def claim(self, name):
+        """Забирает письмо на отправку; None, если его забрал другой
+        обработчик."""
+        try:
+            os.replace(self.path('new', name), self.path('cur', name))
+        except FileNotFoundError:
+            return None
+        with open(self.path('cur', name), 'rb') as file:
+            return pickle.load(file)
+
+    def done(self, name):
+        os.remove(self.path('cur', name))
+
+    def retry(self, name, record, delay):
+        """Возвращает письмо в очередь с отсрочкой."""
+        self.put(
+            record['message'],
+            attempts=record['attempts'] + 1,
+            not_before=time.time() + delay,
+        )
+        self.done(name)
+
+    def fail(self, name):
+        os.replace(self.path('cur', name), self.path('failed', name))
+
+    def recover(self, older_than):
+        """Возвращает в очередь письма, забранные обработчиком, который
+        не закончил их отправку (например, был остановлен)."""
+        recovered = 0
+        deadline = time.time() - older_than
+        for name in os.listdir(self.path('cur')):
+            try:
+                if os.stat(self.path('cur', name)).st_mtime > deadline:
+                    continue
+                os.replace(self.path('cur', name), self.path('new', name))
+            except FileNotFoundError:
+                continue
+            recovered += 1
+        return recovered
+
+    def counts(self):
+        return {
+            state: len(os.listdir(self.path(state)))
+            for state in ('new', 'cur', 'failed')
+        }
+
+
+def get_spool():
+    return MailSpool(settings.EMAIL_QUEUE_DIR)
+
+
+class MailStats:
+    """Счётчики очереди писем процесса для core.metrics."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = defaultdict(int)
+        self.delivery_seconds = 0.0
+
+    def incr(self, key, value=1):
+        with self.lock:
+            self.counters[key] += value
+
+    def observe_batch(self, seconds):
+        with self.lock:
+            self.counters['batches'] += 1
+            self.delivery_seconds += seconds
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                **self.counters,
+                'delivery_seconds': self.delivery_seconds,
+            }
+
+
+mail_stats = MailStats()
+
+
+def is_permanent(error):
+    """Ошибка, при которой повторная отправка не поможет (ответ 5xx)."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(
+            code >= 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code >= 500
+    return False
+
+
+class MailWorker:
+    """
+    Доставляет письма из очереди пачками по EMAIL_QUEUE_BATCH_SIZE
+    через одно соединение бэкенда EMAIL_QUEUE_BACKEND. Письмо,
+    которое не удалось отправить, откладывается на очередную задержку
+    из EMAIL_QUEUE_RETRY_DELAYS; после последней или при отказе 5xx
+    оно переносится в failed. Ошибка разрывает соединение, поэтому
+    оно открывается заново.
+    В процессе приложения обработчик работает в фоновом потоке, если
+    включён EMAIL_QUEUE_WORKER; иначе очередь разбирает команда
+    send_queued_mail.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.event = threading.Event()
+        self.thread = None
+
+    def deliver(self, spool=None):
+        """Отправляет одну пачку писем; возвращает число взятых писем."""
+        spool = spool or get_spool()
+        names = spool.due(settings.EMAIL_QUEUE_BATCH_SIZE)
+        if not names:
+            return 0
+        start = time.perf_counter()
+        connection = get_connection(settings.EMAIL_QUEUE_BACKEND)
+        try:
+            connection.open()
+        except Exception:
+            logger.exception('Mail transport is unavailable')
+            mail_stats.incr('connection_errors')
+            return 0
+        claimed = 0
+        try:
+            for name in names:
+                record = spool.claim(name)
+                if record is None:
+                    continue
+                claimed += 1
+                try:
+                    connection.send_messages([record['message']])
+                except Exception as error:
+                    self.handle_error(spool, name, record, error)
+                    connection.close()
+                    connection.open()
+                else:
+                    spool.done(name)
+                    mail_stats.incr('sent')
+        except Exception:
+            logger.exception('Mail transport is unavailable')
+            mail_stats.incr('connection_errors')
+        finally:
+            connection.close()
+            mail_stats.observe_batch(time.perf_counter() - start)
+        return claimed
+
+    def handle_error(self, spool, name, record, error):
+        delays = settings.EMAIL_QUEUE_RETRY_DELAYS
+        if is_permanent(error) or record['attempts'] >= len(delays):
+            logger.error('Mail %s was not delivered: %s', name, error)
+            spool.fail(name)
+            mail_stats.incr('failed')
+            return
+        logger.warning('Mail %s will be retried: %s', name, error)
+        spool.retry(name, record, delays[record['attempts']])
+        mail_stats.incr('retried')
+
+    def drain(self, spool=None):
+        """Отправляет все письма, время которых наступило."""
+        spool = spool or get_spool()
+        while self.deliver(spool):
+            pass
+
+    def wake(self):
+        """Будит фоновый поток, запуская его при первом вызове."""
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(
+                    target=self.run, name='mail', daemon=True)
+                self.thread.start()
+        self.event.set()
+
+    def run(self):
+        get_spool().recover(settings.EMAIL_QUEUE_CLAIM_TIMEOUT)
+        while True:
+            self.event.wait(settings.EMAIL_QUEUE_INTERVAL)
+            self.event.clear()
+            try:
+                self.drain()
+            except Exception:
+                logger.exception('Mail queue delivery failed')
+
+
+worker = MailWorker()
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """
+    Почтовый бэкенд, который не отправляет письма сам, а записывает
+    их в очередь EMAIL_QUEUE_DIR: запрос не ждёт почтовый сервер.
+    """
+
+    def send_messages(self, email_messages):
+        spool = get_spool()
+        queued = 0
+        for message in email_messages:
+            if not message.recipients():
+                continue
+            try:
+                spool.put(message)
+            except OSError:
+                if not self.fail_silently:
+                    raise
+                continue
+            queued += 1
+        mail_stats.incr('queued', queued)
+        if queued and settings.EMAIL_QUEUE_WORKER:
+            worker.wake()
+        return queued
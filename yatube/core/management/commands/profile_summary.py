@@ -0,0 +1,46 @@
+import io
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.profiling import load_stats, load_timings
+
+
+class Command(BaseCommand):
+    help = (
+        'Выводит средние тайминги и самые затратные функции по каждой '
+        'view из профилей ProfilingMiddleware.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', default=settings.PROFILING_DIR)
+        parser.add_argument('--top', type=int, default=15)
+        parser.add_argument(
+            '--sort',
+            default='cumulative',
+            choices=('cumulative', 'tottime', 'ncalls'),
+        )
+        parser.add_argument('--view', help='Показать только эту view.')
+        parser.add_argument(
+            '--merge',
+            help='Сохранить объединённый профиль выбранной view в файл '
+                 '(для snakeviz или flameprof).',
+        )
+
+    def handle(self, *args, **options):
+        timings = load_timings(options['dir'])
+        stats = load_stats(options['dir'])
+        for name in sorted(stats):
+            view = name.replace('.', ':')
+            if options['view'] and view != options['view']:
+                continue
+            self.stdout.write(self.style.MIGRATE_HEADING(view))
+            self.stdout.write(json.dumps(timings.get(view, {})))
+            output = io.StringIO()
+            stats[name].stream = output
+            stats[name].sort_stats(options['sort']).print_stats(
+                options['top'])
+            self.stdout.write(output.getvalue())
+            if options['merge'] and options['view']:
+                stats[name].dump_stats(options['merge'])
@@ -0,0 +1,39 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.mail import get_spool, mail_stats, worker
+
+
+class Command(BaseCommand):
+    help = (
+        'Доставляет письма из очереди EMAIL_QUEUE_DIR пачками через '
+        'EMAIL_QUEUE_BACKEND, откладывая недоставленные.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Не завершаться, проверяя очередь раз в '
+                 'EMAIL_QUEUE_INTERVAL секунд.',
+        )
+
+    def handle(self, *args, **options):
+        spool = get_spool()
+        recovered = spool.recover(settings.EMAIL_QUEUE_CLAIM_TIMEOUT)
+        if recovered:
+            self.stdout.write(f'Возвращено в очередь писем: {recovered}')
+        while True:
+            worker.drain(spool)
+            if not options['loop']:
+                break
+            time.sleep(settings.EMAIL_QUEUE_INTERVAL)
+        stats = mail_stats.snapshot()
+        counts = spool.counts()
+        self.stdout.write(
+            f"Отправлено: {stats.get('sent', 0)}, "
+            f"отложено: {stats.get('retried', 0)}, "
+            f"не доставлено: {stats.get('failed', 0)}; "
+            f"в очереди: {counts['new']}, в failed: {counts['failed']}")
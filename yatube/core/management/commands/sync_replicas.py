@@ -0,0 +1,33 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite в файлы реплик из '
+        'DATABASE_REPLICAS, имитируя репликацию при локальной проверке.'
+    )
+
+    def handle(self, *args, **options):
+        primary = connections[DEFAULT_DB_ALIAS].settings_dict
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('В DATABASE_REPLICAS нет реплик.')
+        for alias in settings.DATABASE_REPLICAS:
+            replica = connections[alias].settings_dict
+            if {connections[DEFAULT_DB_ALIAS].vendor,
+                    connections[alias].vendor} != {'sqlite'}:
+                raise CommandError(
+                    f'{alias}: копирование поддерживается только для SQLite.')
+            connections[alias].close()
+            source = sqlite3.connect(primary['NAME'])
+            target = sqlite3.connect(replica['NAME'])
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+                source.close()
+            self.stdout.write(self.style.SUCCESS(
+                f'{alias}: {replica["NAME"]} обновлена'))
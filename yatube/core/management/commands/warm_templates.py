@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+
+from core.template_backend import uses_cached_loader, warm_templates
+
+
+class Command(BaseCommand):
+    help = (
+        'Компилирует все шаблоны каталога templates, проверяя их '
+        'синтаксис, и выводит самые долго компилируемые.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--apps',
+            action='store_true',
+            help='Также шаблоны приложений, включая django.contrib.',
+        )
+        parser.add_argument('--top', type=int, default=10)
+
+    def handle(self, *args, **options):
+        if not any(
+                uses_cached_loader(backend.engine)
+                for backend in engines.all()
+                if isinstance(backend, DjangoTemplates)):
+            self.stderr.write(
+                'Кэширующий загрузчик не включен: скомпилированные '
+                'шаблоны не сохранятся между запросами.')
+        timings, errors = warm_templates(options['apps'])
+        slowest = sorted(timings.items(), key=lambda item: -item[1])
+        for name, seconds in slowest[:options['top']]:
+            self.stdout.write(f'{seconds * 1000:8.2f} мс  {name}')
+        self.stdout.write(
+            f'Скомпилировано шаблонов: {len(timings)}, '
+            f'{sum(timings.values()) * 1000:.1f} мс')
+        if errors:
+            raise CommandError('\n'.join(
+                f'{name}: {error}' for name, error in errors.items()))
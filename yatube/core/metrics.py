@@ -0,0 +1,148 @@
+import threading
+from collections import defaultdict
+
+from .mail import get_spool, mail_stats
+from .pool import pool_snapshots
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Metrics:
+    """
+    Метрики запросов процесса в текстовом формате Prometheus:
+    гистограмма длительности по view, суммарное время базы и
+    шаблонов, попадания и промахи кэшей.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = defaultdict(int)
+        self.buckets = defaultdict(lambda: [0] * len(BUCKETS))
+        self.duration = defaultdict(float)
+        self.db = defaultdict(float)
+        self.template = defaultdict(float)
+        self.cache = defaultdict(int)
+
+    def observe(self, view, status, total, db, template, cache):
+        with self.lock:
+            self.requests[(view, status)] += 1
+            buckets = self.buckets[view]
+            for index, bound in enumerate(BUCKETS):
+                if total <= bound:
+                    buckets[index] += 1
+            self.duration[view] += total
+            self.db[view] += db
+            self.template[view] += template
+            for name, result in cache.items():
+                self.cache[(view, name, result)] += 1
+
+    def render(self):
+        with self.lock:
+            lines = [
+                '# HELP yatube_requests_total Обработанные запросы.',
+                '# TYPE yatube_requests_total counter',
+            ]
+            for (view, status), count in sorted(self.requests.items()):
+                lines.append(
+                    f'yatube_requests_total{{view="{view}",'
+                    f'status="{status}"}} {count}')
+            lines += [
+                '# HELP yatube_request_duration_seconds Время обработки.',
+                '# TYPE yatube_request_duration_seconds histogram',
+            ]
+            for view, buckets in sorted(self.buckets.items()):
+                name = 'yatube_request_duration_seconds'
+                for bound, count in zip(BUCKETS, buckets):
+                    lines.append(
+                        f'{name}_bucket{{view="{view}",le="{bound}"}} {count}')
+                count = sum(
+                    value for (name_, _), value in self.requests.items()
+                    if name_ == view)
+                lines += [
+                    f'{name}_bucket{{view="{view}",le="+Inf"}} {count}',
+                    f'{name}_sum{{view="{view}"}} {self.duration[view]:.6f}',
+                    f'{name}_count{{view="{view}"}} {count}',
+                ]
+            for metric, values, help_text in (
+                    ('db', self.db, 'Время запросов к базе.'),
+                    ('template', self.template, 'Время рендеринга шаблонов.')):
+                name = f'yatube_{metric}_seconds_total'
+                lines += [
+                    f'# HELP {name} {help_text}',
+                    f'# TYPE {name} counter',
+                ]
+                for view, value in sorted(values.items()):
+                    lines.append(f'{name}{{view="{view}"}} {value:.6f}')
+            lines += [
+                '# HELP yatube_cache_requests_total Обращения к кэшам.',
+                '# TYPE yatube_cache_requests_total counter',
+            ]
+            for (view, cache, result), count in sorted(self.cache.items()):
+                lines.append(
+                    f'yatube_cache_requests_total{{view="{view}",'
+                    f'cache="{cache}",result="{result}"}} {count}')
+        return '\n'.join(
+            lines + render_pool_metrics() + render_mail_metrics()) + '\n'
+
+
+POOL_METRICS = (
+    ('size', 'gauge', 'Размер пула соединений.'),
+    ('in_use', 'gauge', 'Выданные соединения.'),
+    ('idle', 'gauge', 'Свободные соединения.'),
+    ('created', 'counter', 'Открытые соединения.'),
+    ('reused', 'counter', 'Повторно выданные соединения.'),
+    ('discarded', 'counter', 'Закрытые неисправные и устаревшие.'),
+    ('timeouts', 'counter', 'Ожидания, не дождавшиеся соединения.'),
+    ('wait_seconds', 'counter', 'Время ожидания соединений.'),
+)
+
+
+def render_pool_metrics():
+    """Метрики пулов соединений core.pool."""
+    snapshots = sorted(pool_snapshots().items())
+    lines = []
+    for key, kind, help_text in POOL_METRICS:
+        name = f'yatube_db_pool_{key}'
+        if kind == 'counter':
+            name += '_total'
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+        for (alias, database), snapshot in snapshots:
+            lines.append(
+                f'{name}{{alias="{alias}",database="{database}"}} '
+                f'{snapshot[key]}')
+    return lines
+
+
+MAIL_METRICS = (
+    ('queued', 'Письма, поставленные в очередь.'),
+    ('sent', 'Доставленные письма.'),
+    ('retried', 'Отложенные для повторной отправки.'),
+    ('failed', 'Недоставленные письма.'),
+    ('connection_errors', 'Ошибки соединения с почтовым сервером.'),
+    ('batches', 'Пачки отправки.'),
+    ('delivery_seconds', 'Время отправки пачек.'),
+)
+
+
+def render_mail_metrics():
+    """Метрики очереди писем core.mail: счётчики процесса и
+    количество писем в каталоге очереди."""
+    snapshot = mail_stats.snapshot()
+    lines = []
+    for key, help_text in MAIL_METRICS:
+        name = f'yatube_mail_{key}_total'
+        lines += [
+            f'# HELP {name} {help_text}',
+            f'# TYPE {name} counter',
+            f'{name} {snapshot.get(key, 0)}',
+        ]
+    lines += [
+        '# HELP yatube_mail_spool_messages Письма в каталоге очереди.',
+        '# TYPE yatube_mail_spool_messages gauge',
+    ]
+    for state, count in sorted(get_spool().counts().items()):
+        lines.append(f'yatube_mail_spool_messages{{state="{state}"}} {count}')
+    return lines
+
+
+metrics = Metrics()
@@ -0,0 +1,188 @@
+import cProfile
+import logging
+import pstats
+import random
+import threading
+import time
+
+from django.conf import settings
+
+from .metrics import metrics
+from .profiling import dump_sample, template_time
+from .queries import count_queries, track_writes
+from .routers import set_replica_reads
+from .timing import track_request
+
+logger = logging.getLogger('core.query_budget')
+
+
+class QueryBudgetExceeded(Exception):
+    """View выполнила больше запросов к базе, чем ей разрешено."""
+
+
+def query_budget(limit):
+    """
+    Декоратор задаёт view бюджет запросов к базе на один запрос
+    пользователя. Бюджет учитывает всю обработку запроса,
+    включая сессию, пользователя и рендеринг шаблонов.
+    """
+    def decorator(view):
+        view.query_budget = limit
+        return view
+    return decorator
+
+
+class QueryBudgetMiddleware:
+    """
+    Считает запросы к базе и время обработки каждого запроса.
+    Если view превысила бюджет, заданный декоратором query_budget,
+    пишет предупреждение в лог, а при QUERY_BUDGET_STRICT бросает
+    QueryBudgetExceeded, чтобы регрессия провалила тесты.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        with count_queries() as counter:
+            response = self.get_response(request)
+        budget = getattr(request, 'query_budget', None)
+        response.query_count = counter.count
+        if budget is None or counter.count <= budget:
+            return response
+        view_name = request.resolver_match.view_name
+        message = (
+            f'{view_name}: {counter.count} запросов к базе при бюджете '
+            f'{budget}, {(time.perf_counter() - started) * 1000:.1f} мс '
+            f'({request.path})'
+        )
+        if settings.QUERY_BUDGET_STRICT:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = getattr(view_func, 'query_budget', None)
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Направляет на реплики чтения безопасных запросов к view,
+    помеченным use_replica, включая рендеринг шаблонов. После
+    изменяющего запроса, а также после любого запроса, во время
+    которого что-то записывалось в базу (подписка по GET), клиент
+    получает cookie REPLICA_PIN_COOKIE и на REPLICA_PIN_SECONDS
+    закрепляется за основной базой, чтобы видеть свои изменения
+    до того, как они дойдут до реплик.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            with track_writes() as writes:
+                response = self.get_response(request)
+        finally:
+            set_replica_reads(False)
+        if writes.written or request.method not in (
+                'GET', 'HEAD', 'OPTIONS', 'TRACE'):
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE, '1',
+                max_age=settings.REPLICA_PIN_SECONDS, httponly=True,
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        set_replica_reads(
+            getattr(view_func, 'use_replica', False)
+            and request.method in ('GET', 'HEAD')
+            and settings.REPLICA_PIN_COOKIE not in request.COOKIES
+        )
+
+
+class ServerTimingMiddleware:
+    """
+    Добавляет к ответу заголовок Server-Timing с временем базы,
+    рендеринга шаблонов, результатами обращений к кэшам и общим
+    временем обработки, а также учитывает запрос в метриках
+    процесса по имени view.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with track_request() as timings, count_queries() as counter:
+            response = self.get_response(request)
+            total = timings.total
+        match = request.resolver_match
+        view_name = match.view_name if match else 'unresolved'
+        metrics.observe(
+            view_name, response.status_code, total,
+            counter.duration, timings.template, timings.cache,
+        )
+        entries = [
+            f'db;dur={counter.duration * 1000:.1f};'
+            f'desc="{counter.count} queries"',
+            f'tpl;dur={timings.template * 1000:.1f}',
+        ]
+        entries += [
+            f'cache-{name};desc="{result}"'
+            for name, result in sorted(timings.cache.items())
+        ]
+        entries.append(f'total;dur={total * 1000:.1f}')
+        response['Server-Timing'] = ', '.join(entries)
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Профилирует долю PROFILING_SAMPLE_RATE запросов через cProfile.
+    Профили копятся в памяти по каждой view и сохраняются в
+    PROFILING_DIR вместе с временем запроса, базы и шаблонов.
+    Одновременно профилируется только один запрос процесса,
+    остальные в это время обрабатываются без профилирования.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.lock = threading.Lock()
+        self.stats = {}
+
+    def __call__(self, request):
+        rate = settings.PROFILING_SAMPLE_RATE
+        if not rate or random.random() >= rate:
+            return self.get_response(request)
+        if not self.lock.acquire(blocking=False):
+            return self.get_response(request)
+        try:
+            return self.profile(request)
+        finally:
+            self.lock.release()
+
+    def profile(self, request):
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        with count_queries() as counter:
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        total = time.perf_counter() - started
+        match = request.resolver_match
+        view_name = match.view_name if match else None
+        sample = pstats.Stats(profiler)
+        if view_name in self.stats:
+            self.stats[view_name].add(sample)
+        else:
+            self.stats[view_name] = sample
+        dump_sample(settings.PROFILING_DIR, view_name, self.stats[view_name], {
+            'total_ms': total * 1000,
+            'db_ms': counter.duration * 1000,
+            'queries': counter.count,
+            'template_ms': template_time(sample) * 1000,
+        })
+        return response
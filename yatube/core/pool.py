@@ -0,0 +1,133 @@
+import queue
+import threading
+import time
+
+
+class PoolExhausted(Exception):
+    """Все соединения пула заняты дольше таймаута."""
+
+
+class ConnectionPool:
+    """
+    Ограниченный пул соединений DB-API одной базы для многопоточного
+    WSGI-сервера. Не больше size соединений выдаются одновременно;
+    поток, которому не хватило соединения, ждёт до timeout секунд.
+    Свободное соединение перед выдачей проверяется запросом
+    health_check, а простаивающее дольше max_idle - закрывается.
+    """
+
+    def __init__(self, size, timeout, max_idle, health_check='SELECT 1'):
+        self.size = size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.health_check = health_check
+        self.slots = threading.BoundedSemaphore(size)
+        self.idle = queue.LifoQueue()
+        self.lock = threading.Lock()
+        self.stats = {
+            'created': 0,
+            'reused': 0,
+            'discarded': 0,
+            'timeouts': 0,
+            'in_use': 0,
+            'wait_seconds': 0.0,
+        }
+
+    def count(self, **changes):
+        with self.lock:
+            for name, delta in changes.items():
+                self.stats[name] += delta
+
+    def acquire(self, connect):
+        """Выдаёт проверенное свободное соединение или создаёт новое
+        вызовом connect(). Возвращает пару (соединение, reused)."""
+        started = time.monotonic()
+        acquired = self.slots.acquire(timeout=self.timeout)
+        self.count(wait_seconds=time.monotonic() - started)
+        if not acquired:
+            self.count(timeouts=1)
+            raise PoolExhausted(
+                f'Нет свободного соединения за {self.timeout} с '
+                f'(размер пула {self.size})')
+        try:
+            connection = self.take_idle()
+            reused = connection is not None
+            if not reused:
+                connection = connect()
+        except BaseException:
+            self.slots.release()
+            raise
+        self.count(in_use=1, **{'reused' if reused else 'created': 1})
+        return connection, reused
+
+    def take_idle(self):
+        while True:
+            try:
+                connection, released = self.idle.get_nowait()
+            except queue.Empty:
+                return None
+            if (time.monotonic() - released <= self.max_idle
+                    and self.is_healthy(connection)):
+                return connection
+            self.discard(connection)
+
+    def is_healthy(self, connection):
+        try:
+            connection.execute(self.health_check).fetchall()
+        except Exception:
+            return False
+        return True
+
+    def discard(self, connection):
+        self.count(discarded=1)
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def release(self, connection, reusable=True):
+        """Возвращает соединение в пул; неисправное закрывается."""
+        try:
+            if reusable:
+                self.idle.put((connection, time.monotonic()))
+            else:
+                self.discard(connection)
+        finally:
+            self.count(in_use=-1)
+            self.slots.release()
+
+    def snapshot(self):
+        with self.lock:
+            return {**self.stats, 'idle': self.idle.qsize(),
+                    'size': self.size}
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, settings_dict):
+    """
+    Пул базы по её настройкам или None, если POOL не задан.
+    Пулы различаются файлом базы, поэтому переключение псевдонима
+    на другую базу не выдаёт соединения со старой.
+    """
+    options = settings_dict.get('POOL')
+    if not options:
+        return None
+    key = (alias, settings_dict['NAME'])
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(
+                size=options.get('SIZE', 10),
+                timeout=options.get('TIMEOUT', 10),
+                max_idle=options.get('MAX_IDLE', 300),
+            )
+        return _pools[key]
+
+
+def pool_snapshots():
+    """Метрики всех пулов процесса: {(псевдоним, база): метрики}."""
+    with _pools_lock:
+        pools = dict(_pools)
+    return {key: pool.snapshot() for key, pool in pools.items()}
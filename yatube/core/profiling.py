@@ -0,0 +1,65 @@
+import glob
+import json
+import os
+import pstats
+
+TEMPLATE_RENDER = ('django/template/backends/django.py', 'render')
+
+
+def view_file_name(view_name):
+    return (view_name or 'unresolved').replace(':', '.')
+
+
+def template_time(stats):
+    """Суммарное время рендеринга шаблонов по данным профиля:
+    кумулятивное время Template.render бэкенда Django."""
+    for (filename, _, function), row in stats.stats.items():
+        if (filename.replace(os.sep, '/').endswith(TEMPLATE_RENDER[0])
+                and function == TEMPLATE_RENDER[1]):
+            return row[3]
+    return 0.0
+
+
+def dump_sample(directory, view_name, stats, timings):
+    """
+    Сохраняет накопленный профиль view в <view>.<pid>.prof -
+    формат pstats, который читают snakeviz, flameprof и gprof2dot,
+    и дописывает тайминги запроса в timings.<pid>.jsonl.
+    """
+    os.makedirs(directory, exist_ok=True)
+    pid = os.getpid()
+    name = view_file_name(view_name)
+    stats.dump_stats(os.path.join(directory, f'{name}.{pid}.prof'))
+    with open(os.path.join(directory, f'timings.{pid}.jsonl'), 'a') as file:
+        file.write(json.dumps({'view': view_name, **timings}) + '\n')
+
+
+def load_timings(directory):
+    """Средние тайминги сэмплов по каждой view."""
+    totals = {}
+    for path in glob.glob(os.path.join(directory, 'timings.*.jsonl')):
+        with open(path) as file:
+            for line in file:
+                sample = json.loads(line)
+                view = totals.setdefault(sample.pop('view'), {'samples': 0})
+                view['samples'] += 1
+                for key, value in sample.items():
+                    view[key] = view.get(key, 0) + value
+    for view in totals.values():
+        samples = view.pop('samples')
+        for key in list(view):
+            view[key] = round(view[key] / samples, 3)
+        view['samples'] = samples
+    return totals
+
+
+def load_stats(directory):
+    """Объединяет профили всех процессов: view -> pstats.Stats."""
+    merged = {}
+    for path in sorted(glob.glob(os.path.join(directory, '*.prof'))):
+        name = os.path.basename(path).rsplit('.', 2)[0]
+        if name in merged:
+            merged[name].add(path)
+        else:
+            merged[name] = pstats.Stats(path)
+    return merged
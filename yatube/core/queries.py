@@ -0,0 +1,55 @@
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+
+
+class QueryCounter:
+    """Обёртка выполнения SQL, считающая запросы и время в базе."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+class WriteTracker:
+    """Обёртка выполнения SQL, отмечающая изменяющие запросы."""
+
+    WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+    def __init__(self):
+        self.written = False
+
+    def __call__(self, execute, sql, params, many, context):
+        if not self.written:
+            statement = sql.lstrip()[:len('REPLACE')].upper()
+            self.written = statement.startswith(self.WRITE_STATEMENTS)
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def wrap_queries(wrapper):
+    """Подключает обёртку к соединениям текущего потока со всеми
+    базами данных."""
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(wrapper))
+        yield wrapper
+
+
+def track_writes():
+    """Отмечает, изменял ли текущий поток данные в какой-либо базе."""
+    return wrap_queries(WriteTracker())
+
+
+def count_queries():
+    """Считает запросы текущего потока ко всем базам данных."""
+    return wrap_queries(QueryCounter())
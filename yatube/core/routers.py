@@ -0,0 +1,75 @@
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+_state = threading.local()
+
+
+def use_replica(view):
+    """
+    Декоратор разрешает view только для чтения брать данные
+    с реплик из DATABASE_REPLICAS.
+    """
+    view.use_replica = True
+    return view
+
+
+def set_replica_reads(enabled):
+    _state.replicas = enabled
+
+
+@contextmanager
+def replica_reads():
+    """Направляет чтения текущего потока на реплики."""
+    previous = getattr(_state, 'replicas', False)
+    set_replica_reads(True)
+    try:
+        yield
+    finally:
+        set_replica_reads(previous)
+
+
+class PrimaryReplicaRouter:
+    """
+    Маршрутизатор основной базы и реплик. Объект, прочитанный
+    с реплики, записывается в default; остальные записи маршрутизатор
+    не трогает, и Django направляет их в базу объекта или в default,
+    так что migrate и запись через using() в другие базы работают как
+    без маршрутизатора. Чтение уходит на случайную реплику только внутри
+    replica_reads(), то есть во view, помеченных use_replica;
+    модели из PRIMARY_ONLY_APPS (пользователи, сессии) всегда
+    читаются из основной базы, чтобы вход и выход сразу
+    вступали в силу.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if (not replicas or not getattr(_state, 'replicas', False)
+                or model._meta.app_label in settings.PRIMARY_ONLY_APPS):
+            return DEFAULT_DB_ALIAS
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db in replicas:
+            return instance._state.db
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        instance = hints.get('instance')
+        if (instance is not None
+                and instance._state.db in settings.DATABASE_REPLICAS):
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """Реплики получают схему вместе с данными основной базы."""
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
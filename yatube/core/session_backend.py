@@ -0,0 +1,148 @@
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import (BACKEND_SESSION_KEY, HASH_SESSION_KEY,
+                                 SESSION_KEY)
+from django.contrib.sessions.backends.cached_db import \
+    SessionStore as CachedDBStore
+from django.db import (DEFAULT_DB_ALIAS, close_old_connections, connections,
+                       router, transaction)
+
+logger = logging.getLogger(__name__)
+
+AUTH_SESSION_KEYS = (SESSION_KEY, BACKEND_SESSION_KEY, HASH_SESSION_KEY)
+
+
+def auth_state(session):
+    return tuple(session.get(key) for key in AUTH_SESSION_KEYS)
+
+
+class WriteBehindBuffer:
+    """
+    Отложенная запись изменённых сессий в базу. Для каждой сессии
+    хранится только последняя версия, поэтому несколько изменений
+    между сбросами дают одну запись. Сброс лишь обновляет существующие
+    строки: сессия, удалённая при выходе, не воскреснет из буфера.
+    Запись помнит базу, в которую её надо сбросить: если псевдоним
+    с тех пор указывает на другую базу (как после load_test), запись
+    отбрасывается.
+    Поток сброса работает раз в SESSION_WRITE_BEHIND_INTERVAL секунд;
+    для базы в памяти (тесты) он не запускается, и буфер сбрасывается
+    вызовом flush().
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.thread = None
+
+    def add(self, store):
+        using = router.db_for_write(store.model)
+        with self.lock:
+            self.pending[store.session_key] = (
+                using,
+                connections[using].settings_dict['NAME'],
+                store.encode(store._get_session()),
+                store.get_expiry_date(),
+            )
+            if self.thread is None and not (
+                    connections[DEFAULT_DB_ALIAS].is_in_memory_db()):
+                atexit.register(self.flush_at_exit)
+                self.thread = threading.Thread(
+                    target=self.run, name='sessions', daemon=True)
+                self.thread.start()
+
+    def discard(self, session_key):
+        with self.lock:
+            self.pending.pop(session_key, None)
+
+    def flush(self):
+        """Записывает накопленные сессии в базу, одной транзакцией
+        на каждую базу."""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        by_database = {}
+        for session_key, (using, name, data, expire_date) in (
+                pending.items()):
+            if connections[using].settings_dict['NAME'] != name:
+                continue
+            by_database.setdefault(using, []).append(
+                (session_key, data, expire_date))
+        model = SessionStore.get_model_class()
+        written = 0
+        try:
+            for using, sessions in by_database.items():
+                with transaction.atomic(using=using):
+                    for session_key, data, expire_date in sessions:
+                        model.objects.using(using).filter(
+                            session_key=session_key,
+                        ).update(session_data=data, expire_date=expire_date)
+                written += len(sessions)
+        except Exception:
+            with self.lock:
+                for session_key, value in pending.items():
+                    self.pending.setdefault(session_key, value)
+            raise
+        return written
+
+    def flush_at_exit(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('Session write-behind failed at exit')
+
+    def run(self):
+        while True:
+            time.sleep(settings.SESSION_WRITE_BEHIND_INTERVAL)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Session write-behind failed')
+            finally:
+                close_old_connections()
+
+
+write_behind = WriteBehindBuffer()
+
+
+class SessionStore(CachedDBStore):
+    """
+    Сессии в кэше с отложенной записью в базу: запрос читает сессию
+    из кэша, а в базу обращается только при промахе. Сессия, созданная
+    в этом запросе (вход, смена ключа), и изменение ключей входа
+    записываются в базу сразу: иначе вход терялся бы при вытеснении
+    из кэша, перезапуске или запросе к другому процессу. Остальные
+    изменения попадают в кэш и в буфер write_behind.
+    """
+
+    def load(self):
+        data = super().load()
+        self._loaded_auth = auth_state(data)
+        return data
+
+    def create(self):
+        super().create()
+        self._created = True
+
+    def save(self, must_create=False):
+        if (must_create or self.session_key is None
+                or getattr(self, '_created', False)
+                or auth_state(self._get_session())
+                != getattr(self, '_loaded_auth', None)):
+            write_behind.discard(self.session_key)
+            super().save(must_create)
+            self._loaded_auth = auth_state(self._get_session())
+            return
+        self._cache.set(
+            self.cache_key, self._get_session(), self.get_expiry_age())
+        write_behind.add(self)
+
+    def delete(self, session_key=None):
+        if session_key is None:
+            session_key = self.session_key
+        if session_key is not None:
+            write_behind.discard(session_key)
+        super().delete(session_key)
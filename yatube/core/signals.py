@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .auth_backend import user_cache_key
+from .sqlite import apply_pragmas
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """Настраивает каждое новое соединение с SQLite
+    по SQLITE_PRAGMAS. Соединения из пула уже настроены."""
+    if connection.vendor == 'sqlite' and not getattr(
+            connection, 'connection_reused', False):
+        apply_pragmas(connection.connection, settings.SQLITE_PRAGMAS)
+
+
+@receiver(request_started)
+def check_persistent_connections(**kwargs):
+    """
+    Проверяет постоянные соединения (CONN_MAX_AGE) баз с
+    CONN_HEALTH_CHECKS перед обработкой запроса: неработающее
+    соединение закрывается и будет открыто заново при первом
+    запросе к базе, а не сломает view.
+    """
+    for connection in connections.all():
+        if (connection.connection is not None
+                and connection.settings_dict.get('CONN_HEALTH_CHECKS')
+                and not connection.is_usable()):
+            connection.close()
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Сбрасывает закэшированного пользователя сессии
+    (core.auth_backend), в том числе после смены пароля."""
+    cache.delete(user_cache_key(instance.pk))
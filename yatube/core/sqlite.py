@@ -0,0 +1,16 @@
+def apply_pragmas(connection, pragmas):
+    """
+    Выполняет PRAGMA из словаря {имя: значение} на соединении
+    sqlite3 в порядке словаря. Запросы идут мимо обёрток Django
+    и не попадают в счётчики запросов view.
+    """
+    for name, value in pragmas.items():
+        connection.execute(f'PRAGMA {name} = {value}')
+
+
+def read_pragmas(connection, names):
+    """Текущие значения PRAGMA соединения sqlite3."""
+    return {
+        name: connection.execute(f'PRAGMA {name}').fetchone()[0]
+        for name in names
+    }
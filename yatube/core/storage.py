@@ -0,0 +1,59 @@
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.map', '.svg', '.ico', '.json', '.txt', '.html', '.xml',
+)
+MIN_COMPRESS_SIZE: int = 256
+
+
+def compressed_variants(data):
+    """Сжатые варианты содержимого {суффикс: байты}; brotli - только
+    если установлен пакет Brotli."""
+    variants = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(data)
+    return variants
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Хранилище collectstatic: имена файлов с хешем содержимого,
+    manifest staticfiles.json и рядом с каждым хешированным
+    текстовым файлом - сжатые копии .gz и .br, которые отдаёт
+    core.views.static_file. Копия сохраняется, только если она
+    заметно меньше исходного файла.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed_names = set()
+        for name, hashed_name, processed in super().post_process(
+                paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed_names.add(hashed_name)
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for hashed_name in sorted(hashed_names):
+            if hashed_name.endswith(COMPRESSIBLE_EXTENSIONS):
+                self.compress(hashed_name)
+
+    def compress(self, name):
+        path = self.path(name)
+        with open(path, 'rb') as file:
+            data = file.read()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return
+        for suffix, compressed in compressed_variants(data).items():
+            if len(compressed) < len(data) * 0.95:
+                with open(path + suffix, 'wb') as file:
+                    file.write(compressed)
+            elif os.path.exists(path + suffix):
+                os.remove(path + suffix)
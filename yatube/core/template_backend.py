@@ -0,0 +1,83 @@
+import os
+import time
+
+from django.template import (TemplateDoesNotExist, TemplateSyntaxError,
+                             engines)
+from django.template.backends.django import DjangoTemplates, Template, reraise
+from django.template.loaders import cached
+from django.template.utils import get_app_template_dirs
+
+from .timing import record_template_time
+
+
+class TimedTemplate(Template):
+    """Шаблон, время рендеринга которого учитывается в таймингах запроса."""
+
+    def render(self, context=None, request=None):
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            record_template_time(time.perf_counter() - started)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Бэкенд шаблонов Django, замеряющий время рендеринга."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(
+                self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+def template_names(engine, include_apps=False):
+    """
+    Имена всех шаблонов каталогов DIRS движка, а с include_apps -
+    и каталогов templates приложений.
+    """
+    directories = list(engine.dirs)
+    if include_apps:
+        directories += get_app_template_dirs('templates')
+    names = set()
+    for directory in directories:
+        for root, _, files in os.walk(directory):
+            for file in files:
+                path = os.path.join(root, file)
+                names.add(
+                    os.path.relpath(path, directory).replace(os.sep, '/'))
+    return sorted(names)
+
+
+def uses_cached_loader(engine):
+    return any(
+        isinstance(loader, cached.Loader)
+        for loader in engine.template_loaders
+    )
+
+
+def warm_templates(include_apps=False):
+    """
+    Компилирует все шаблоны движков Django. С кэширующим загрузчиком
+    скомпилированные шаблоны остаются в памяти процесса, и запросы
+    не читают и не разбирают файлы. Возвращает время компиляции
+    каждого шаблона в секундах и ошибки синтаксиса.
+    """
+    timings = {}
+    errors = {}
+    for backend in engines.all():
+        if not isinstance(backend, DjangoTemplates):
+            continue
+        for name in template_names(backend.engine, include_apps):
+            started = time.perf_counter()
+            try:
+                backend.engine.get_template(name)
+            except TemplateSyntaxError as exc:
+                errors[name] = str(exc)
+                continue
+            timings[name] = time.perf_counter() - started
+    return timings, errors
@@ -0,0 +1,522 @@
+import os
+import socketserver
+import sqlite3
+import tempfile
+import threading
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY, get_user_model
+from django.contrib.sessions.models import Session
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.mail import EmailMessage
+from django.core.management import call_command
+from django.db import connection, connections
+from django.http import HttpResponse
+from django.template import engines
+from django.test import (RequestFactory, SimpleTestCase, TestCase,
+                         override_settings)
+from django.urls import resolve, reverse
+
+from posts.models import Group
+
+from .auth_backend import user_cache_key
+from .mail import get_spool, worker
+from .metrics import metrics
+from .middleware import (QueryBudgetExceeded, QueryBudgetMiddleware,
+                         ReplicaRoutingMiddleware, query_budget)
+from .pool import ConnectionPool, PoolExhausted, get_pool
+from .routers import PrimaryReplicaRouter, replica_reads, use_replica
+from .session_backend import SessionStore, write_behind
+from .sqlite import read_pragmas
+from .views import static_file
+
+User = get_user_model()
+
+
+@query_budget(1)
+def two_queries_view(request):
+    User.objects.count()
+    User.objects.exists()
+    return HttpResponse()
+
+
+class QueryBudgetMiddlewareTests(TestCase):
+
+    def get_response(self):
+        request = RequestFactory().get('/')
+        request.resolver_match = resolve('/')
+        middleware = QueryBudgetMiddleware(
+            lambda request: two_queries_view(request))
+        middleware.process_view(request, two_queries_view, (), {})
+        return middleware(request)
+
+    @override_settings(QUERY_BUDGET_STRICT=True)
+    def test_strict_budget_raises(self):
+        """В строгом режиме превышение бюджета - исключение."""
+        with self.assertRaises(QueryBudgetExceeded):
+            self.get_response()
+
+    @override_settings(QUERY_BUDGET_STRICT=False)
+    def test_budget_logged(self):
+        """Без строгого режима превышение бюджета пишется в лог."""
+        with self.assertLogs('core.query_budget', 'WARNING') as logs:
+            response = self.get_response()
+        self.assertEqual(response.query_count, 2)
+        self.assertIn('posts:index: 2', logs.output[0])
+
+
+class ProfilingMiddlewareTests(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_sampled_requests_profiled(self):
+        """Сэмплированные запросы сохраняются в профиль view,
+        а команда profile_summary выводит его сводку."""
+        with override_settings(
+                PROFILING_SAMPLE_RATE=1, PROFILING_DIR=self.directory.name):
+            self.client.get('/about/author/')
+            self.client.get('/about/author/')
+        files = os.listdir(self.directory.name)
+        self.assertIn(f'about.author.{os.getpid()}.prof', files)
+        output = StringIO()
+        call_command(
+            'profile_summary', '--dir', self.directory.name, stdout=output)
+        self.assertIn('about:author', output.getvalue())
+        self.assertIn('"samples": 2', output.getvalue())
+        self.assertIn('function calls', output.getvalue())
+
+    def test_profiling_disabled(self):
+        """При нулевой доле сэмплирования профили не пишутся."""
+        with override_settings(
+                PROFILING_SAMPLE_RATE=0, PROFILING_DIR=self.directory.name):
+            self.client.get('/about/author/')
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+
+class ServerTimingTests(TestCase):
+
+    def test_server_timing_header(self):
+        """Ответ содержит разбивку времени обработки запроса."""
+        response = self.client.get('/about/author/')
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="\d+ queries"')
+        self.assertRegex(timing, r'tpl;dur=[\d.]+')
+        self.assertRegex(timing, r'total;dur=[\d.]+$')
+
+    def test_page_cache_reported(self):
+        """Попадание в кэш страниц видно в Server-Timing."""
+        cache.clear()
+        first = self.client.get('/')
+        second = self.client.get('/')
+        self.assertIn('cache-page;desc="miss"', first['Server-Timing'])
+        self.assertIn('cache-page;desc="hit"', second['Server-Timing'])
+
+    def test_metrics_endpoint(self):
+        """Метрики агрегируются по имени view."""
+        self.client.get('/about/tech/')
+        response = self.client.get('/metrics/')
+        content = response.content.decode()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            'yatube_requests_total{view="about:tech",status="200"}', content)
+        self.assertIn(
+            'yatube_request_duration_seconds_count{view="about:tech"}',
+            content)
+        self.assertIn(
+            'yatube_template_seconds_total{view="about:tech"}', content)
+
+    def test_metrics_refused_to_other_addresses(self):
+        """Метрики недоступны адресам вне METRICS_ALLOWED_IPS."""
+        response = self.client.get('/metrics/', REMOTE_ADDR='203.0.113.7')
+        self.assertEqual(response.status_code, 404)
+        with self.settings(METRICS_ALLOWED_IPS=[]):
+            self.assertEqual(
+                self.client.get('/metrics/').status_code, 404)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(TestCase):
+
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+
+    def test_router(self):
+        """Чтение с реплики только внутри replica_reads и не для
+        пользователей; прочитанное с реплики записывается в основную
+        базу, остальные записи маршрутизатор не направляет."""
+        self.assertEqual(self.router.db_for_read(Group), 'default')
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Group), 'replica')
+            self.assertEqual(self.router.db_for_read(User), 'default')
+            self.assertIsNone(self.router.db_for_write(Group))
+        group = Group(title='Группа', slug='group')
+        group._state.db = 'other'
+        self.assertIsNone(self.router.db_for_write(Group, instance=group))
+        group._state.db = 'replica'
+        self.assertEqual(
+            self.router.db_for_write(Group, instance=group), 'default')
+        self.assertFalse(self.router.allow_migrate('replica', 'posts'))
+
+    def route(self, request, write=False):
+        routed = []
+
+        @use_replica
+        def view(request):
+            routed.append(self.router.db_for_read(Group))
+            if write:
+                Group.objects.create(title='Группа', slug='group')
+            return HttpResponse()
+
+        middleware = ReplicaRoutingMiddleware(view)
+        middleware.process_view(request, view, (), {})
+        response = middleware(request)
+        routed.append(self.router.db_for_read(Group))
+        return routed, response
+
+    def test_middleware(self):
+        """Безопасные запросы к view use_replica читают с реплики,
+        после изменяющего запроса клиент закреплён за основной базой."""
+        factory = RequestFactory()
+        routed, _ = self.route(factory.get('/'))
+        self.assertEqual(routed, ['replica', 'default'])
+        routed, response = self.route(factory.post('/'))
+        self.assertEqual(routed, ['default', 'default'])
+        cookie = response.cookies[settings.REPLICA_PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], settings.REPLICA_PIN_SECONDS)
+        request = factory.get('/')
+        request.COOKIES[settings.REPLICA_PIN_COOKIE] = cookie.value
+        routed, _ = self.route(request)
+        self.assertEqual(routed, ['default', 'default'])
+
+    def test_middleware_pins_after_write_on_get(self):
+        """Запрос GET, во время которого view писала в базу, тоже
+        закрепляет клиента за основной базой."""
+        _, response = self.route(RequestFactory().get('/'))
+        self.assertNotIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+        _, response = self.route(RequestFactory().get('/'), write=True)
+        self.assertIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+
+
+class SqlitePragmasTests(TestCase):
+
+    def test_pragmas_applied(self):
+        """Новое соединение с SQLite настроено по SQLITE_PRAGMAS."""
+        connection.ensure_connection()
+        pragmas = read_pragmas(
+            connection.connection, ('synchronous', 'busy_timeout'))
+        self.assertEqual(pragmas, {'synchronous': 1, 'busy_timeout': 5000})
+
+
+class ConnectionPoolTests(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.name = os.path.join(directory.name, 'pool.sqlite3')
+
+    def connect(self):
+        return sqlite3.connect(self.name, check_same_thread=False)
+
+    def test_pool_bounded_and_reused(self):
+        """Пул выдаёт не больше size соединений, повторно использует
+        свободные и заменяет неисправные."""
+        pool = ConnectionPool(size=1, timeout=0.01, max_idle=60)
+        first, reused = pool.acquire(self.connect)
+        self.assertFalse(reused)
+        with self.assertRaises(PoolExhausted):
+            pool.acquire(self.connect)
+        pool.release(first)
+        second, reused = pool.acquire(self.connect)
+        self.assertIs(second, first)
+        self.assertTrue(reused)
+        second.close()
+        pool.release(second)
+        third, reused = pool.acquire(self.connect)
+        self.assertFalse(reused)
+        pool.release(third)
+        self.assertEqual(pool.snapshot(), {
+            'created': 2, 'reused': 1, 'discarded': 1, 'timeouts': 1,
+            'in_use': 0, 'idle': 1, 'size': 1,
+            'wait_seconds': pool.stats['wait_seconds'],
+        })
+
+    def test_backend_uses_pool(self):
+        """Закрытое соединение бэкенда возвращается в пул и выдаётся
+        снова без повторной настройки."""
+        connections.databases['pooled'] = {
+            **connections.databases['default'],
+            'NAME': self.name,
+            'POOL': {'SIZE': 2, 'TIMEOUT': 1},
+        }
+        self.addCleanup(connections.databases.pop, 'pooled')
+        pooled = connections['pooled']
+        self.addCleanup(connections.__delitem__, 'pooled')
+        pooled.ensure_connection()
+        raw = pooled.connection
+        pooled.close()
+        pooled.ensure_connection()
+        self.assertIs(pooled.connection, raw)
+        self.assertTrue(pooled.connection_reused)
+        pooled.close()
+        pool = get_pool('pooled', connections.databases['pooled'])
+        self.assertEqual(pool.snapshot()['idle'], 1)
+        self.assertIn(
+            f'yatube_db_pool_reused_total{{alias="pooled",'
+            f'database="{self.name}"}} 1',
+            metrics.render(),
+        )
+
+
+class WarmTemplatesTests(SimpleTestCase):
+
+    def test_templates_compiled_into_cache(self):
+        """warm_templates компилирует шаблоны проекта в кэш
+        кэширующего загрузчика."""
+        from yatube.settings_production import TEMPLATES
+
+        with override_settings(TEMPLATES=TEMPLATES):
+            output = StringIO()
+            call_command('warm_templates', stdout=output)
+            loader = engines.all()[0].engine.template_loaders[0]
+            self.assertIn('base.html', loader.get_template_cache)
+            self.assertIn(
+                'posts/includes/post.html', loader.get_template_cache)
+        self.assertIn('Скомпилировано шаблонов', output.getvalue())
+
+
+class StaticFilesTests(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = directory.name
+
+    def test_collected_files_hashed_and_compressed(self):
+        """collectstatic пишет хешированные имена, manifest и сжатые
+        копии, а static_file отдаёт сжатую копию с immutable."""
+        with override_settings(
+                STATIC_ROOT=self.root,
+                STATICFILES_STORAGE=(
+                    'core.storage.CompressedManifestStaticFilesStorage')):
+            call_command('collectstatic', interactive=False, verbosity=0)
+            name = staticfiles_storage.stored_name('css/bootstrap.min.css')
+            self.assertRegex(name, r'bootstrap\.min\.[0-9a-f]{12}\.css$')
+            self.assertTrue(
+                os.path.exists(os.path.join(self.root, name + '.gz')))
+            request = RequestFactory().get(
+                '/static/' + name, HTTP_ACCEPT_ENCODING='gzip, deflate')
+            response = static_file(request, name)
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertEqual(response['Content-Type'], 'text/css')
+            self.assertIn('immutable', response['Cache-Control'])
+            self.assertEqual(response['Vary'], 'Accept-Encoding')
+            request = RequestFactory().get('/static/' + name)
+            response = static_file(request, name)
+            self.assertFalse(response.has_header('Content-Encoding'))
+
+
+class SMTPStandInHandler(socketserver.StreamRequestHandler):
+    """Минимальный SMTP-сервер: принимает письма в server.messages
+    и отклоняет получателей из server.rejected с заданным кодом."""
+
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply('220 stand-in')
+        recipients = []
+        for line in self.rfile:
+            command = line.decode().strip()
+            verb = command[:4].upper()
+            if verb == 'MAIL':
+                recipients = []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                address = command.split(':', 1)[1].strip(' <>')
+                code = self.server.rejected.get(address)
+                if code:
+                    self.reply(f'{code} rejected')
+                else:
+                    recipients.append(address)
+                    self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                data = []
+                for chunk in self.rfile:
+                    if chunk.rstrip(b'\r\n') == b'.':
+                        break
+                    data.append(chunk)
+                self.server.messages.append((recipients, b''.join(data)))
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('250 OK')
+
+
+class MailQueueTests(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        server = socketserver.ThreadingTCPServer(
+            ('127.0.0.1', 0), SMTPStandInHandler)
+        server.daemon_threads = True
+        server.connections = 0
+        server.messages = []
+        server.rejected = {}
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.server = server
+        settings_override = override_settings(
+            EMAIL_BACKEND='core.mail.QueuedEmailBackend',
+            EMAIL_QUEUE_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_QUEUE_DIR=directory.name,
+            EMAIL_QUEUE_WORKER=False,
+            EMAIL_HOST='127.0.0.1',
+            EMAIL_PORT=server.server_address[1],
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_password_reset_queued(self):
+        """Сброс пароля не отправляет письмо в запросе, а ставит его
+        в очередь; обработчик доставляет его на SMTP-сервер."""
+        User.objects.create_user(
+            username='reset', email='reset@example.com', password='pass')
+        response = self.client.post(
+            reverse('users:password_reset_form'),
+            {'email': 'reset@example.com'},
+        )
+        self.assertRedirects(response, reverse('users:password_reset_done'))
+        self.assertEqual(self.server.connections, 0)
+        self.assertEqual(get_spool().counts()['new'], 1)
+
+        worker.drain()
+        self.assertEqual(get_spool().counts()['new'], 0)
+        [(recipients, data)] = self.server.messages
+        self.assertEqual(recipients, ['reset@example.com'])
+        self.assertIn(b'/auth/reset/', data)
+
+    def test_batch_uses_one_connection_and_retries(self):
+        """Пачка отправляется через одно соединение; временный отказ
+        откладывает письмо, отказ 5xx переносит его в failed."""
+        for address in ('a@example.com', 'b@example.com', 'c@example.com'):
+            EmailMessage('Тема', 'Текст', to=[address]).send()
+        worker.drain()
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(len(self.server.messages), 3)
+
+        self.server.rejected = {
+            'busy@example.com': 451, 'missing@example.com': 550}
+        for address in ('busy@example.com', 'missing@example.com'):
+            EmailMessage('Тема', 'Текст', to=[address]).send()
+        with self.assertLogs('core.mail', 'WARNING') as logs:
+            worker.drain()
+        self.assertEqual(len(logs.records), 2)
+        self.assertEqual(
+            get_spool().counts(), {'new': 1, 'cur': 0, 'failed': 1})
+        self.assertEqual(get_spool().due(10), [])
+        self.assertIn(
+            'yatube_mail_spool_messages{state="failed"} 1',
+            self.client.get(reverse('metrics')).content.decode())
+
+
+class SessionCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='cached', password='old-password')
+
+    def tearDown(self):
+        write_behind.flush()
+
+    def test_authenticated_request_without_queries(self):
+        """Сессия и пользователь берутся из кэша."""
+        self.client.force_login(self.user)
+        self.client.get(reverse('about:author'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('about:author'))
+        self.assertEqual(response.context['user'], self.user)
+
+    def test_password_change_invalidates_cached_user(self):
+        """После смены пароля другие сессии пользователя закрываются."""
+        other = self.client_class()
+        other.force_login(self.user)
+        other.get(reverse('about:author'))
+        self.client.force_login(self.user)
+        self.client.post(reverse('users:password_change_form'), {
+            'old_password': 'old-password',
+            'new_password1': 'Rather-Long-New-42',
+            'new_password2': 'Rather-Long-New-42',
+        })
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+        response = self.client.get(reverse('about:author'))
+        self.assertTrue(response.context['user'].is_authenticated)
+        response = other.get(reverse('about:author'))
+        self.assertFalse(response.context['user'].is_authenticated)
+
+    def test_changes_written_behind(self):
+        """Изменения сессии в следующих запросах попадают в базу при
+        сбросе буфера, а удалённая сессия из буфера не восстанавливается."""
+        created = SessionStore()
+        created['value'] = 1
+        created.create()
+        store = SessionStore(created.session_key)
+        store['value'] = 2
+        store.save()
+        store['value'] = 3
+        store.save()
+        self.assertEqual(SessionStore(store.session_key)['value'], 3)
+
+        def stored_value():
+            row = Session.objects.get(session_key=store.session_key)
+            return row.get_decoded()['value']
+
+        self.assertEqual(stored_value(), 1)
+        self.assertEqual(write_behind.flush(), 1)
+        self.assertEqual(stored_value(), 3)
+
+        store['value'] = 4
+        store.save()
+        store.delete()
+        self.assertEqual(write_behind.flush(), 0)
+        self.assertFalse(
+            Session.objects.filter(session_key=store.session_key).exists())
+
+    def test_login_written_through(self):
+        """Вход сразу записывается в базу, а не только в кэш."""
+        self.client.post(reverse('users:login'), {
+            'username': 'cached', 'password': 'old-password'})
+        session_key = self.client.cookies[settings.SESSION_COOKIE_NAME].value
+        row = Session.objects.get(session_key=session_key)
+        self.assertEqual(row.get_decoded()[SESSION_KEY], str(self.user.pk))
+        cache.clear()
+        response = self.client.get(reverse('about:author'))
+        self.assertEqual(response.context['user'], self.user)
+
+    def test_pending_dropped_for_switched_database(self):
+        """Запись не сбрасывается в другую базу, на которую с тех пор
+        указывает псевдоним."""
+        created = SessionStore()
+        created['value'] = 1
+        created.create()
+        store = SessionStore(created.session_key)
+        store['value'] = 2
+        store.save()
+        settings_dict = connections['default'].settings_dict
+        original = settings_dict['NAME']
+        settings_dict['NAME'] = 'other.sqlite3'
+        try:
+            self.assertEqual(write_behind.flush(), 0)
+        finally:
+            settings_dict['NAME'] = original
+        self.assertEqual(write_behind.flush(), 0)
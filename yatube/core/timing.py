@@ -0,0 +1,46 @@
+import threading
+import time
+from contextlib import contextmanager
+
+_local = threading.local()
+
+
+class RequestTimings:
+    """Разбивка времени обработки одного запроса."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.template = 0.0
+        self.cache = {}
+
+    @property
+    def total(self):
+        return time.perf_counter() - self.started
+
+
+def current_timings():
+    """Тайминги запроса, который обрабатывает текущий поток."""
+    return getattr(_local, 'timings', None)
+
+
+@contextmanager
+def track_request():
+    timings = RequestTimings()
+    _local.timings = timings
+    try:
+        yield timings
+    finally:
+        _local.timings = None
+
+
+def record_template_time(seconds):
+    timings = current_timings()
+    if timings is not None:
+        timings.template += seconds
+
+
+def record_cache(name, hit):
+    """Отмечает попадание (hit) или промах в кэш name."""
+    timings = current_timings()
+    if timings is not None:
+        timings.cache[name] = 'hit' if hit else 'miss'
@@ -0,0 +1,84 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.http.response import HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from .metrics import metrics
+from .middleware import query_budget
+
+# Имя файла с хешем содержимого от ManifestStaticFilesStorage
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{12}\.[^/]+$')
+
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+@query_budget(0)
+def metrics_view(request):
+    """Метрики процесса в текстовом формате Prometheus. Отдаются
+    только адресам из METRICS_ALLOWED_IPS, остальным - 404."""
+    if request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        raise Http404
+    return HttpResponse(
+        metrics.render(), content_type='text/plain; version=0.0.4')
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding, кроме отключённых через q=0."""
+    encodings = set()
+    for item in header.split(','):
+        name, _, params = item.strip().partition(';')
+        if params.strip().replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00'):
+            continue
+        encodings.add(name.strip().lower())
+    return encodings
+
+
+@query_budget(0)
+def static_file(request, path):
+    """
+    Отдаёт файл из STATIC_ROOT, выбирая заранее сжатую копию .br
+    или .gz по Accept-Encoding. Файлы с хешем в имени не меняются,
+    поэтому кэшируются браузером и прокси навсегда (immutable),
+    остальные - на STATIC_UNHASHED_MAX_AGE секунд.
+    """
+    try:
+        full_path = safe_join(settings.STATIC_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404(path)
+    if not os.path.isfile(full_path):
+        raise Http404(path)
+    content_type, _ = mimetypes.guess_type(full_path)
+    accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    encoding = None
+    for name, suffix in ENCODINGS:
+        if name in accepted and os.path.isfile(full_path + suffix):
+            encoding, full_path = name, full_path + suffix
+            break
+    stat = os.stat(full_path)
+    if not was_modified_since(
+            request.META.get('HTTP_IF_MODIFIED_SINCE'),
+            stat.st_mtime, stat.st_size):
+        response = HttpResponseNotModified()
+    else:
+        response = FileResponse(
+            open(full_path, 'rb'),
+            content_type=content_type or 'application/octet-stream',
+        )
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        if encoding is not None:
+            response['Content-Encoding'] = encoding
+    if HASHED_NAME_RE.search(path):
+        response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    else:
+        response['Cache-Control'] = (
+            f'public, max-age={settings.STATIC_UNHASHED_MAX_AGE}')
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Group, Post
+from .models import Follow, Group, Post
 
 
 @admin.register(Post)
@@ -23,3 +23,4 @@ class PostAdmin(admin.ModelAdmin):
 
 
 admin.site.register(Group)
+admin.site.register(Follow)
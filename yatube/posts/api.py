@@ -0,0 +1,139 @@
+import hashlib
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, JsonResponse
+from django.utils.cache import get_conditional_response
+from django.views.decorators.http import require_safe
+
+from core.middleware import query_budget
+from core.routers import use_replica
+
+from .constants import API_MAX_PAGE_SIZE, POSTS_AMOUNT
+from .models import Group, Post, User
+from .utils import CursorPaginator
+
+POST_FIELDS = (
+    'id', 'text', 'pub_date', 'edited', 'author__username', 'group__slug')
+
+
+def serialize_post(values):
+    """Представление поста в API из строки values()."""
+    return {
+        'id': values['id'],
+        'text': values['text'],
+        'pub_date': values['pub_date'],
+        'edited': values['edited'],
+        'author': values['author__username'],
+        'group': values['group__slug'],
+    }
+
+
+def dump(value):
+    return json.dumps(value, cls=DjangoJSONEncoder, ensure_ascii=False)
+
+
+def make_etag(*parts):
+    """Строгий ETag по идентификаторам и датам изменения постов."""
+    digest = hashlib.md5(dump(parts).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+class ValuesCursorPaginator(CursorPaginator):
+    """Курсорная пагинация по строкам values() вместо моделей."""
+
+    @staticmethod
+    def encode_cursor(direction, post):
+        return CursorPaginator.encode_position(
+            direction, post['pub_date'], post['id'])
+
+
+def page_size(request):
+    try:
+        size = int(request.GET.get('limit', POSTS_AMOUNT))
+    except ValueError:
+        return POSTS_AMOUNT
+    return min(max(size, 1), API_MAX_PAGE_SIZE)
+
+
+def serialize_page(page):
+    return {
+        'results': [serialize_post(post) for post in page],
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    }
+
+
+def feed_response(request, posts):
+    """
+    Страница ленты в JSON. Строки выбираются одним запросом values()
+    без создания моделей; ETag считается по идентификаторам и
+    датам изменения постов, при совпадении с If-None-Match
+    возвращается 304 без тела. Страница не больше API_MAX_PAGE_SIZE
+    постов и нужна целиком для ETag и курсоров, поэтому ответ
+    собирается сразу, без потоковой отдачи.
+    """
+    paginator = ValuesCursorPaginator(
+        posts.values(*POST_FIELDS), page_size(request))
+    page = paginator.get_page(request.GET.get('cursor'))
+    etag = make_etag(
+        [(post['id'], post['edited']) for post in page],
+        page.has_next(), page.has_previous(),
+    )
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+    response = JsonResponse(
+        serialize_page(page), json_dumps_params={'ensure_ascii': False})
+    response['ETag'] = etag
+    return response
+
+
+@use_replica
+@require_safe
+@query_budget(1)
+def index(request):
+    """Лента всех постов."""
+    return feed_response(request, Post.objects.all())
+
+
+@use_replica
+@require_safe
+@query_budget(2)
+def group_posts(request, slug):
+    """Лента постов группы."""
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'pk', flat=True).first()
+    if group_id is None:
+        raise Http404('Группа не найдена')
+    return feed_response(request, Post.objects.filter(group_id=group_id))
+
+
+@use_replica
+@require_safe
+@query_budget(2)
+def profile(request, username):
+    """Лента постов автора."""
+    author_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True).first()
+    if author_id is None:
+        raise Http404('Автор не найден')
+    return feed_response(request, Post.objects.filter(author_id=author_id))
+
+
+@use_replica
+@require_safe
+@query_budget(1)
+def post_detail(request, post_id):
+    """Один пост."""
+    post = Post.objects.filter(pk=post_id).values(*POST_FIELDS).first()
+    if post is None:
+        raise Http404('Пост не найден')
+    etag = make_etag(post['id'], post['edited'])
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+    response = JsonResponse(
+        serialize_post(post), json_dumps_params={'ensure_ascii': False})
+    response['ETag'] = etag
+    return response
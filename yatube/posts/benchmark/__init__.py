@@ -0,0 +1,23 @@
+from .database import seed, sqlite_database, sqlite_default_database
+from .load import SCENARIOS, LoadRunner, percentile
+from .plans import feed_querysets, feed_timings, is_index_ordered, query_plans
+from .pragmas import PRAGMA_CONFIGS, pragma_comparison
+from .render import loader_timings, render_timings, sample_page
+
+__all__ = [
+    'PRAGMA_CONFIGS',
+    'SCENARIOS',
+    'LoadRunner',
+    'feed_querysets',
+    'feed_timings',
+    'is_index_ordered',
+    'loader_timings',
+    'percentile',
+    'pragma_comparison',
+    'query_plans',
+    'render_timings',
+    'sample_page',
+    'seed',
+    'sqlite_database',
+    'sqlite_default_database',
+]
@@ -0,0 +1,101 @@
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+
+from ..models import Group, Post, User
+from ..rendering import render_text
+
+SEED_BATCH_SIZE: int = 10000
+SQLITE_ENGINE = 'core.backends.sqlite3'
+
+
+@contextmanager
+def sqlite_database(alias, name):
+    """
+    Временно подключает отдельную базу SQLite под псевдонимом alias
+    и применяет к ней миграции. Основная база не затрагивается.
+    """
+    connections.databases[alias] = {
+        **settings.DATABASES['default'],
+        'ENGINE': SQLITE_ENGINE,
+        'NAME': name,
+    }
+    try:
+        call_command('migrate', database=alias, verbosity=0)
+        yield connections[alias]
+    finally:
+        connections[alias].close()
+        del connections[alias]
+        del connections.databases[alias]
+
+
+@contextmanager
+def sqlite_default_database(name, engine=SQLITE_ENGINE):
+    """
+    Временно направляет псевдоним default на отдельную базу SQLite,
+    чтобы view, работающие с default, обслуживались из неё.
+    Соединение текущего потока пересоздаётся, чтобы применился
+    бэкенд engine. Используется командами нагрузочного тестирования.
+    """
+    connections[DEFAULT_DB_ALIAS].close()
+    settings_dict = connections.databases[DEFAULT_DB_ALIAS]
+    original = dict(settings_dict)
+    settings_dict.update(ENGINE=engine, NAME=name)
+    del connections[DEFAULT_DB_ALIAS]
+    try:
+        call_command('migrate', verbosity=0)
+        yield connections[DEFAULT_DB_ALIAS]
+    finally:
+        connections[DEFAULT_DB_ALIAS].close()
+        settings_dict.clear()
+        settings_dict.update(original)
+        del connections[DEFAULT_DB_ALIAS]
+
+
+def seed(using, users, groups, posts, batch_size=SEED_BATCH_SIZE):
+    """
+    Наполняет базу пользователями, группами и постами.
+    Посты вставляются пачками через executemany, минуя ORM,
+    а даты публикации распределяются по последним годам.
+    """
+    User.objects.using(using).bulk_create(
+        (User(username=f'bench_user_{i}', password=make_password(None))
+         for i in range(users)),
+    )
+    Group.objects.using(using).bulk_create(
+        (Group(title=f'Группа {i}', slug=f'bench-group-{i}',
+               description='Группа для нагрузочного теста')
+         for i in range(groups)),
+    )
+    user_ids = list(User.objects.using(using).values_list('pk', flat=True))
+    group_ids = list(
+        Group.objects.using(using).values_list('pk', flat=True)) or [None]
+    now = timezone.now()
+    sql = (
+        f'INSERT INTO {Post._meta.db_table} '
+        '(text, text_html, excerpt, pub_date, edited, author_id, group_id, '
+        "fanned_out, image) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, '')"
+    )
+    with transaction.atomic(using=using), \
+            connections[using].cursor() as cursor:
+        for start in range(0, posts, batch_size):
+            rows = []
+            for i in range(start, min(start + batch_size, posts)):
+                pub_date = now - timedelta(seconds=random.randrange(10 ** 8))
+                text = f'Пост номер {i}'
+                rows.append((
+                    text,
+                    *render_text(text),
+                    pub_date,
+                    pub_date,
+                    random.choice(user_ids),
+                    random.choice(group_ids),
+                    True,
+                ))
+            cursor.executemany(sql, rows)
@@ -0,0 +1,148 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections
+from django.test import Client
+from django.urls import reverse
+
+from core.queries import count_queries
+
+from ..models import Group, Post, User
+
+SCENARIOS = (
+    'index',
+    'group_posts',
+    'profile',
+    'post_detail',
+    'post_create',
+)
+
+
+class ThreadClient(Client):
+    """
+    Тестовый клиент для многопоточной нагрузки. Обычный Client
+    подписан на сигнал got_request_exception и принимает исключения
+    запросов всех потоков; этот - только своего.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.thread = threading.get_ident()
+
+    def store_exc_info(self, **kwargs):
+        if threading.get_ident() == self.thread:
+            super().store_exc_info(**kwargs)
+
+
+def percentile(values, percent):
+    """Перцентиль отсортированного списка методом ближайшего ранга."""
+    if not values:
+        return None
+    rank = max(1, -(-len(values) * percent // 100))
+    return values[int(rank) - 1]
+
+
+class LoadRunner:
+    """
+    Прогоняет сценарии через тестовый клиент Django в несколько
+    потоков. У каждого потока свои клиенты и соединение с базой.
+    Анонимные запросы могут обслуживаться кэшем страниц;
+    с authenticated=True чтение идёт от авторизованного пользователя.
+    """
+
+    def __init__(self, scenarios=SCENARIOS, authenticated=False):
+        self.scenarios = scenarios
+        self.authenticated = authenticated
+        self.local = threading.local()
+        self.users = list(User.objects.values_list('username', flat=True))
+        self.slugs = list(Group.objects.values_list('slug', flat=True))
+        self.post_ids = list(Post.objects.values_list('pk', flat=True))
+
+    def clients(self):
+        if not hasattr(self.local, 'anonymous'):
+            self.local.anonymous = ThreadClient()
+            self.local.authorized = ThreadClient()
+            self.local.authorized.force_login(
+                User.objects.get(username=self.users[0]))
+        return self.local.anonymous, self.local.authorized
+
+    def request(self, scenario, number):
+        anonymous, authorized = self.clients()
+        client = authorized if self.authenticated else anonymous
+        pick = number * 7919
+        if scenario == 'index':
+            return client.get(reverse('posts:index'))
+        if scenario == 'group_posts':
+            return client.get(reverse(
+                'posts:group_list',
+                kwargs={'slug': self.slugs[pick % len(self.slugs)]}))
+        if scenario == 'profile':
+            return client.get(reverse(
+                'posts:profile',
+                kwargs={'username': self.users[pick % len(self.users)]}))
+        if scenario == 'post_detail':
+            return client.get(reverse(
+                'posts:post_detail',
+                kwargs={'post_id': self.post_ids[
+                    pick % len(self.post_ids)]}))
+        return authorized.post(
+            reverse('posts:post_create'),
+            {'text': f'Пост нагрузочного теста {number}'},
+        )
+
+    def measure(self, number):
+        scenario = self.scenarios[number % len(self.scenarios)]
+        started = time.perf_counter()
+        try:
+            with count_queries() as counter:
+                response = self.request(scenario, number)
+            ok = response.status_code < 400
+        except Exception:
+            ok = False
+        finally:
+            # Тестовый клиент не закрывает соединения в конце запроса,
+            # как обработчик WSGI; без этого поток держит соединение
+            # пула между запросами.
+            close_old_connections()
+        return scenario, time.perf_counter() - started, counter.count, ok
+
+    def run(self, requests, concurrency):
+        """Выполняет requests запросов и возвращает отчёт с
+        перцентилями задержки, RPS и числом запросов к базе.
+        Ошибки сервера учитываются в отчёте, а не в логе."""
+        request_logger = logging.getLogger('django.request')
+        level = request_logger.level
+        request_logger.setLevel(logging.CRITICAL)
+        started = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                results = list(executor.map(self.measure, range(requests)))
+        finally:
+            request_logger.setLevel(level)
+        elapsed = time.perf_counter() - started
+        by_scenario = defaultdict(list)
+        for result in results:
+            by_scenario[result[0]].append(result)
+        report = {
+            'requests': requests,
+            'concurrency': concurrency,
+            'authenticated': self.authenticated,
+            'elapsed_s': round(elapsed, 3),
+            'rps': round(requests / elapsed, 2),
+            'views': {},
+        }
+        for scenario, items in by_scenario.items():
+            latencies = sorted(item[1] * 1000 for item in items)
+            report['views'][scenario] = {
+                'requests': len(items),
+                'errors': sum(1 for item in items if not item[3]),
+                'p50_ms': round(percentile(latencies, 50), 3),
+                'p95_ms': round(percentile(latencies, 95), 3),
+                'p99_ms': round(percentile(latencies, 99), 3),
+                'queries_per_request': round(
+                    sum(item[2] for item in items) / len(items), 2),
+            }
+        return report
@@ -0,0 +1,50 @@
+import time
+
+from django.db import connections
+
+from ..constants import POSTS_AMOUNT
+from ..models import Post
+
+
+def feed_querysets(using):
+    """Запросы лент index, profile и group_posts в том виде,
+    в каком их выполняет пагинатор."""
+    post = Post.objects.using(using).order_by('?').first()
+    group_id = Post.objects.using(using).exclude(
+        group=None).values_list('group_id', flat=True).first()
+    posts = Post.objects.using(using).select_related('author', 'group')
+    return {
+        'index': posts[:POSTS_AMOUNT],
+        'profile': posts.filter(author_id=post.author_id)[:POSTS_AMOUNT],
+        'group_posts': posts.filter(group_id=group_id)[:POSTS_AMOUNT],
+    }
+
+
+def query_plans(using):
+    """Возвращает план выполнения (EXPLAIN QUERY PLAN) запросов лент."""
+    plans = {}
+    with connections[using].cursor() as cursor:
+        for name, queryset in feed_querysets(using).items():
+            sql, params = queryset.query.sql_with_params()
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plans[name] = [row[-1] for row in cursor.fetchall()]
+    return plans
+
+
+def is_index_ordered(plan):
+    """План не содержит отдельной сортировки результата."""
+    return not any('TEMP B-TREE' in step for step in plan)
+
+
+def feed_timings(using, repeat=5):
+    """Лучшее время выполнения запросов лент в миллисекундах."""
+    timings = {}
+    for name, queryset in feed_querysets(using).items():
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            list(queryset.all())
+            elapsed = (time.perf_counter() - started) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        timings[name] = round(best, 3)
+    return timings
@@ -0,0 +1,51 @@
+import os
+import tempfile
+
+from django.conf import settings
+from django.test import override_settings
+
+from core.sqlite import read_pragmas
+
+from .database import SQLITE_ENGINE, seed, sqlite_default_database
+from .load import LoadRunner
+
+PRAGMA_NAMES = (
+    'journal_mode', 'synchronous', 'busy_timeout', 'cache_size',
+    'mmap_size', 'temp_store',
+)
+
+# Бэкенд и PRAGMA сравниваемых конфигураций; None - SQLITE_PRAGMAS
+PRAGMA_CONFIGS = {
+    'default': ('django.db.backends.sqlite3', {}),
+    'tuned': (SQLITE_ENGINE, None),
+}
+
+
+def pragma_comparison(users, groups, posts, requests, concurrency,
+                      scenarios, authenticated=False, configs=None):
+    """
+    Прогоняет одну и ту же смешанную нагрузку чтения и записи на
+    свежих базах SQLite с разными настройками: 'default' - бэкенд
+    Django и PRAGMA по умолчанию, 'tuned' - транзакции BEGIN
+    IMMEDIATE и SQLITE_PRAGMAS из настроек.
+    Возвращает отчёты LoadRunner и действующие значения PRAGMA.
+    """
+    configs = configs or PRAGMA_CONFIGS
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, (engine, pragmas) in configs.items():
+            if pragmas is None:
+                pragmas = settings.SQLITE_PRAGMAS
+            path = os.path.join(tmp, f'{name}.sqlite3')
+            with override_settings(SQLITE_PRAGMAS=pragmas), \
+                    sqlite_default_database(path, engine) as connection:
+                seed('default', users, groups, posts)
+                runner = LoadRunner(scenarios, authenticated)
+                report = runner.run(requests, concurrency)
+                connection.ensure_connection()
+                report['pragmas'] = read_pragmas(
+                    connection.connection, PRAGMA_NAMES)
+            report['errors'] = sum(
+                view['errors'] for view in report['views'].values())
+            results[name] = report
+    return results
@@ -0,0 +1,111 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.paginator import Paginator
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+from django.utils import timezone
+
+from core.template_backend import TimedDjangoTemplates
+
+from ..constants import POSTS_AMOUNT
+from ..models import Group, Post, User
+from ..rendering import render_text
+
+
+def sample_page(text_length):
+    """Страница несохранённых постов для замеров рендеринга
+    шаблонов без обращения к базе."""
+    author = User(pk=1, username='bench', first_name='Лев', last_name='Т')
+    group = Group(pk=1, title='Группа', slug='bench-group')
+    paragraph = 'Текст поста для замера рендеринга. ' * 10
+    text = '\n\n'.join(
+        [paragraph] * max(1, text_length // len(paragraph)))
+    now = timezone.now()
+    text_html, excerpt = render_text(text)
+    posts = [
+        Post(pk=i, text=text, text_html=text_html, excerpt=excerpt,
+             pub_date=now, edited=now, author=author, group=group)
+        for i in range(1, POSTS_AMOUNT + 1)
+    ]
+    return Paginator(posts, POSTS_AMOUNT).page(1)
+
+
+def render_timings(template_name='posts/index.html', repeat=100,
+                   text_length=2000):
+    """
+    Среднее время рендеринга страницы ленты в миллисекундах:
+    cold - каждая карточка поста рендерится заново (версия поста
+    меняется на каждой итерации), warm - карточки берутся из кэша.
+    """
+    request = RequestFactory().get('/')
+    request.user = AnonymousUser()
+    page_obj = sample_page(text_length)
+    timings = {}
+    for mode in ('cold', 'warm'):
+        render_to_string(template_name, {'page_obj': page_obj}, request)
+        started = time.perf_counter()
+        for _ in range(repeat):
+            if mode == 'cold':
+                for post in page_obj:
+                    post.edited += timedelta(microseconds=1)
+            render_to_string(
+                template_name, {'page_obj': page_obj}, request)
+        timings[mode] = round(
+            (time.perf_counter() - started) * 1000 / repeat, 3)
+    return timings
+
+
+LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+LOADER_CONFIGS = {
+    'uncached': LOADERS,
+    'cached': [('django.template.loaders.cached.Loader', LOADERS)],
+}
+
+
+def template_backend(loaders):
+    """Движок шаблонов проекта с заданными загрузчиками."""
+    options = settings.TEMPLATES[0]
+    return TimedDjangoTemplates({
+        'NAME': 'benchmark',
+        'DIRS': options['DIRS'],
+        'APP_DIRS': False,
+        'OPTIONS': {**options['OPTIONS'], 'loaders': loaders},
+    })
+
+
+def loader_timings(template_name='posts/index.html', repeat=100,
+                   text_length=2000):
+    """
+    Среднее время в миллисекундах на запрос страницы с загрузчиками
+    без кэша и с кэширующим загрузчиком: 'load' - поиск и разбор
+    шаблона, 'render' - загрузка вместе с рендерингом, как в view.
+    Карточки постов берутся из кэша фрагментов, поэтому разница
+    показывает стоимость чтения и разбора шаблонов на каждом запросе.
+    """
+    request = RequestFactory().get('/')
+    request.user = AnonymousUser()
+    context = {'page_obj': sample_page(text_length)}
+    timings = {}
+    for name, loaders in LOADER_CONFIGS.items():
+        backend = template_backend(loaders)
+        backend.get_template(template_name).render(context, request)
+        started = time.perf_counter()
+        for _ in range(repeat):
+            backend.get_template(template_name)
+        load = time.perf_counter() - started
+        started = time.perf_counter()
+        for _ in range(repeat):
+            backend.get_template(template_name).render(context, request)
+        render = time.perf_counter() - started
+        timings[name] = {
+            'load': round(load * 1000 / repeat, 3),
+            'render': round(render * 1000 / repeat, 3),
+        }
+    return timings
@@ -0,0 +1,86 @@
+import hashlib
+
+from django.views.decorators.http import condition
+
+from .constants import POSTS_AMOUNT
+from .models import Follow, Group, Post, User
+from .page_cache import get_scope_version
+from .utils import CachedCountPaginator
+
+
+def conditional_page(validators_func):
+    """
+    Декоратор условного GET для страниц постов. validators_func по
+    запросу и аргументам view возвращает словарь с частями ETag
+    ('etag') или None, когда объекта нет и страницу надо отдать
+    как есть. Совпадение с If-None-Match даёт 304 без рендеринга.
+    ETag учитывает пользователя: страницы различаются шапкой
+    и кнопками автора. Last-Modified не выставляется, потому что
+    дата не может зависеть от пользователя: клиент с одним
+    If-Modified-Since получил бы 304 после входа или выхода.
+    """
+    def etag(request, *args, **kwargs):
+        validators = validators_func(request, *args, **kwargs)
+        if validators is None:
+            return None
+        raw = repr((*validators['etag'], request.user.pk))
+        return hashlib.md5(raw.encode()).hexdigest()
+
+    return condition(etag_func=etag)
+
+
+def feed_validators(scope, posts, count_key):
+    """
+    Части ETag ленты: дата последней публикации (индексный запрос),
+    количество постов из кэша счётчиков и версия области кэша
+    страниц, которую сигналы меняют при любом изменении постов
+    ленты, а также при смене имени их автора или данных группы.
+    """
+    latest = posts.order_by('-pub_date').values_list(
+        'pub_date', flat=True).first()
+    count = CachedCountPaginator(posts, POSTS_AMOUNT, count_key).count
+    return {'etag': (get_scope_version(scope), latest, count)}
+
+
+def index_validators(request):
+    return feed_validators('index', Post.objects.all(), 'index')
+
+
+def group_validators(request, slug):
+    group_id = Group.objects.filter(slug=slug).values_list(
+        'pk', flat=True).first()
+    if group_id is None:
+        return None
+    return feed_validators(
+        f'group:{slug}',
+        Post.objects.filter(group_id=group_id),
+        f'group:{group_id}',
+    )
+
+
+def profile_validators(request, username):
+    author_id = User.objects.filter(username=username).values_list(
+        'pk', flat=True).first()
+    if author_id is None:
+        return None
+    validators = feed_validators(
+        f'author:{username}',
+        Post.objects.filter(author_id=author_id),
+        f'author:{author_id}',
+    )
+    following = request.user.is_authenticated and Follow.objects.filter(
+        user=request.user, author_id=author_id).exists()
+    validators['etag'] += (following,)
+    return validators
+
+
+def post_validators(request, post_id):
+    """Дата изменения поста, а также счётчик постов и имя автора,
+    которые выводятся рядом с ним, одним запросом."""
+    post = Post.objects.filter(pk=post_id).values(
+        'edited', 'group__title', 'author__first_name',
+        'author__last_name', 'author__posts_counter__posts_count',
+    ).first()
+    if post is None:
+        return None
+    return {'etag': tuple(post.values())}
@@ -1,2 +1,13 @@
 POSTS_AMOUNT: int = 10
 LEN_STR: int = 15
+CURSOR_NEXT: str = 'n'
+CURSOR_PREVIOUS: str = 'p'
+PAGE_WINDOW: int = 2
+COUNT_CACHE_TIMEOUT: int = 60 * 5
+EXCERPT_LENGTH: int = 30
+FANOUT_LIMIT: int = 1000
+FOLLOW_BACKFILL: int = 100
+API_MAX_PAGE_SIZE: int = 100
+FEED_ITEMS: int = 20
+POST_IMAGE_MAX_SIZE: int = 5 * 1024 * 1024
+FEED_THUMBNAIL: str = '960x339'
@@ -0,0 +1,62 @@
+from django.db import DEFAULT_DB_ALIAS, connections, router, transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+UPSERT_USER_COUNTER_SQL = (
+    'INSERT INTO {table} (user_id, posts_count) VALUES (%s, %s) '
+    'ON CONFLICT (user_id) DO UPDATE '
+    'SET posts_count = posts_count + excluded.posts_count'
+)
+
+
+def change_posts_count(author_id=None, group_id=None, delta=1):
+    """
+    Изменяет счётчики постов автора и группы на delta.
+    Увеличение счётчика автора - один запрос INSERT ... ON CONFLICT,
+    который создаёт счётчик при первом посте.
+    Уменьшение не создаёт счётчик и не опускает его ниже нуля:
+    при удалении пользователя каскад удаляет его счётчик раньше постов.
+    """
+    from .models import Group, UserPostsCounter
+
+    if author_id is not None:
+        if delta < 0:
+            UserPostsCounter.objects.filter(
+                user_id=author_id, posts_count__gte=-delta,
+            ).update(posts_count=F('posts_count') + delta)
+        else:
+            using = router.db_for_write(UserPostsCounter)
+            with connections[using].cursor() as cursor:
+                cursor.execute(
+                    UPSERT_USER_COUNTER_SQL.format(
+                        table=UserPostsCounter._meta.db_table),
+                    [author_id, delta],
+                )
+    if group_id is not None:
+        groups = Group.objects.filter(pk=group_id)
+        if delta < 0:
+            groups = groups.filter(posts_count__gte=-delta)
+        groups.update(posts_count=F('posts_count') + delta)
+
+
+def recount_posts(using=DEFAULT_DB_ALIAS):
+    """
+    Пересчитывает счётчики постов всех групп и пользователей
+    агрегирующими запросами.
+    """
+    from .models import Group, Post, User, UserPostsCounter
+
+    group_counts = Post.objects.using(using).filter(
+        group=OuterRef('pk')).order_by().values('group').annotate(
+        total=Count('pk')).values('total')
+    with transaction.atomic(using=using):
+        Group.objects.using(using).update(posts_count=Coalesce(
+            Subquery(group_counts, output_field=IntegerField()), 0))
+        UserPostsCounter.objects.using(using).delete()
+        users = User.objects.using(using).annotate(
+            total=Count('posts')).filter(total__gt=0).values_list(
+            'pk', 'total')
+        UserPostsCounter.objects.using(using).bulk_create(
+            (UserPostsCounter(user_id=pk, posts_count=total)
+             for pk, total in users.iterator()),
+        )
@@ -0,0 +1,162 @@
+from django.contrib.syndication.views import Feed
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, set_response_etag
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.http import parse_http_date_safe
+
+from core.middleware import query_budget
+from core.routers import use_replica
+
+from .constants import FEED_ITEMS
+from .models import Group, Post, User
+from .page_cache import cache_anonymous_page
+
+FEED_FIELDS = (
+    'id', 'excerpt', 'text_html', 'pub_date', 'edited',
+    'author__username', 'author__first_name', 'author__last_name',
+)
+
+
+class PostsFeed(Feed):
+    """
+    RSS последних постов. Посты выбираются одним запросом values()
+    без создания моделей.
+    """
+
+    title = 'Yatube: последние записи'
+    description = 'Новые записи всех авторов'
+
+    def link(self):
+        return reverse('posts:index')
+
+    def posts(self, obj):
+        return Post.objects.all()
+
+    def items(self, obj):
+        return self.posts(obj).values(*FEED_FIELDS)[:FEED_ITEMS]
+
+    def item_title(self, item):
+        return item['excerpt']
+
+    def item_description(self, item):
+        return item['text_html']
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', kwargs={'post_id': item['id']})
+
+    def item_pubdate(self, item):
+        return item['pub_date']
+
+    def item_updateddate(self, item):
+        return item['edited']
+
+    def item_author_name(self, item):
+        full_name = f'{item["author__first_name"]} {item["author__last_name"]}'
+        return full_name.strip() or item['author__username']
+
+
+class GroupPostsFeed(PostsFeed):
+    """RSS последних постов группы."""
+
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def title(self, obj):
+        return f'Yatube: {obj.title}'
+
+    def description(self, obj):
+        return obj.description
+
+    def link(self, obj):
+        return reverse('posts:group_list', kwargs={'slug': obj.slug})
+
+    def posts(self, obj):
+        return Post.objects.filter(group=obj)
+
+
+class AuthorPostsFeed(PostsFeed):
+    """RSS последних постов автора."""
+
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def title(self, obj):
+        return f'Yatube: {obj.get_full_name() or obj.username}'
+
+    def description(self, obj):
+        return f'Записи пользователя {obj.username}'
+
+    def link(self, obj):
+        return reverse('posts:profile', kwargs={'username': obj.username})
+
+    def posts(self, obj):
+        return Post.objects.filter(author=obj)
+
+
+class AtomFeedMixin:
+    feed_type = Atom1Feed
+
+    def subtitle(self, obj):
+        return self._get_dynamic_attr('description', obj)
+
+
+class PostsAtomFeed(AtomFeedMixin, PostsFeed):
+    pass
+
+
+class GroupPostsAtomFeed(AtomFeedMixin, GroupPostsFeed):
+    pass
+
+
+class AuthorPostsAtomFeed(AtomFeedMixin, AuthorPostsFeed):
+    pass
+
+
+AUTH_QUERIES = 2
+
+
+def feed_view(feed, scope_func, budget):
+    """
+    View ленты с условным GET. Анонимные ответы хранятся в кэше
+    страниц вместе с ETag в области scope_func и сбрасываются
+    сигналами при изменении постов, поэтому опрос ленты без
+    изменений не обращается к базе. Бюджет budget - запросы самой
+    ленты; к нему добавляются два запроса на сессию и пользователя,
+    которые нужны, чтобы отличить анонимный запрос, когда их нет
+    в кэше.
+    """
+    @use_replica
+    @cache_anonymous_page(scope_func)
+    @query_budget(budget + AUTH_QUERIES)
+    def view(request, *args, **kwargs):
+        response = feed(request, *args, **kwargs)
+        set_response_etag(response)
+        return get_conditional_response(
+            request,
+            etag=response['ETag'],
+            last_modified=parse_http_date_safe(
+                response.get('Last-Modified')),
+            response=response,
+        )
+    return view
+
+
+def index_scope():
+    return 'index'
+
+
+def group_scope(slug):
+    return f'group:{slug}'
+
+
+def author_scope(username):
+    return f'author:{username}'
+
+
+posts_rss = feed_view(PostsFeed(), index_scope, 1)
+posts_atom = feed_view(PostsAtomFeed(), index_scope, 1)
+group_rss = feed_view(GroupPostsFeed(), group_scope, 2)
+group_atom = feed_view(GroupPostsAtomFeed(), group_scope, 2)
+author_rss = feed_view(AuthorPostsFeed(), author_scope, 2)
+author_atom = feed_view(AuthorPostsAtomFeed(), author_scope, 2)
@@ -1,5 +1,7 @@
 from django import forms
+from django.template.defaultfilters import filesizeformat
 
+from .constants import POST_IMAGE_MAX_SIZE
 from .models import Post
 
 
@@ -7,4 +9,12 @@ class PostForm(forms.ModelForm):
     """Форма создания поста"""
     class Meta:
         model = Post
-        fields = ('text', 'group',)
+        fields = ('text', 'group', 'image',)
+
+    def clean_image(self):
+        image = self.cleaned_data['image']
+        if image and image.size > POST_IMAGE_MAX_SIZE:
+            raise forms.ValidationError(
+                'Размер картинки не должен превышать '
+                f'{filesizeformat(POST_IMAGE_MAX_SIZE)}')
+        return image
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from posts.transfer import write_records
+
+from .import_posts import detect_format
+
+
+class Command(BaseCommand):
+    help = (
+        'Экспортирует пользователей, группы и посты в JSON Lines '
+        'или посты в CSV, не загружая таблицы в память.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл или "-" для stdout.')
+        parser.add_argument('--format', choices=('jsonl', 'csv'))
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = detect_format(path, options['format'])
+        if path == '-':
+            write_records(self.stdout, fmt, options['database'])
+            return
+        with open(path, 'w', encoding='utf-8', newline='') as stream:
+            total = write_records(stream, fmt, options['database'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Экспортировано записей: {total}'))
@@ -0,0 +1,46 @@
+import json
+import os
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.benchmark import (feed_timings, is_index_ordered, query_plans,
+                             seed, sqlite_database)
+
+BENCH_ALIAS = 'feed_plans'
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет отдельную базу SQLite постами и проверяет, что запросы '
+        'лент index, profile и group_posts сортируются по индексу.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1000000)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=100)
+        parser.add_argument(
+            '--db',
+            help='Файл базы; по умолчанию создаётся временный.',
+        )
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as tmp:
+            name = options['db'] or os.path.join(tmp, 'feed_plans.sqlite3')
+            with sqlite_database(BENCH_ALIAS, name):
+                seed(BENCH_ALIAS, options['users'], options['groups'],
+                     options['posts'])
+                plans = query_plans(BENCH_ALIAS)
+                timings = feed_timings(BENCH_ALIAS)
+        report = {
+            view: {
+                'plan': plan,
+                'index_ordered': is_index_ordered(plan),
+                'best_ms': timings[view],
+            }
+            for view, plan in plans.items()
+        }
+        self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
+        if not all(view['index_ordered'] for view in report.values()):
+            raise CommandError('Есть запросы лент с сортировкой без индекса.')
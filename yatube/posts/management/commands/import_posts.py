@@ -0,0 +1,42 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.transfer import TRANSFER_BATCH_SIZE, PostImporter, read_records
+
+
+def detect_format(path, fmt):
+    if fmt:
+        return fmt
+    return 'csv' if path.endswith('.csv') else 'jsonl'
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует пользователей, группы и посты из JSON Lines или CSV '
+        'пачками через bulk_create.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл или "-" для stdin.')
+        parser.add_argument('--format', choices=('jsonl', 'csv'))
+        parser.add_argument(
+            '--batch-size', type=int, default=TRANSFER_BATCH_SIZE)
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = detect_format(path, options['format'])
+        importer = PostImporter(options['database'], options['batch_size'])
+        stream = sys.stdin if path == '-' else open(
+            path, encoding='utf-8', newline='')
+        try:
+            imported = importer.run(read_records(stream, fmt))
+        except (KeyError, ValueError) as exc:
+            raise CommandError(f'Ошибка импорта: {exc!r}')
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        self.stdout.write(self.style.SUCCESS(
+            'Импортировано: пользователей {user}, групп {group}, '
+            'постов {post}'.format(**imported)))
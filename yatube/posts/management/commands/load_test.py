@@ -0,0 +1,62 @@
+import json
+import os
+import tempfile
+
+from django.core.management.base import BaseCommand
+
+from posts.benchmark import (SCENARIOS, LoadRunner, seed,
+                             sqlite_default_database)
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет отдельную базу SQLite и нагружает view приложения '
+        'posts в несколько потоков. Печатает отчёт в JSON: перцентили '
+        'задержки, RPS и число запросов к базе на запрос.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--groups', type=int, default=10)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument(
+            '--scenarios',
+            nargs='+',
+            choices=SCENARIOS,
+            default=SCENARIOS,
+        )
+        parser.add_argument(
+            '--authenticated',
+            action='store_true',
+            help='Читать страницы авторизованным пользователем, '
+                 'минуя кэш страниц для анонимов.',
+        )
+        parser.add_argument(
+            '--db',
+            help='Файл базы; по умолчанию создаётся временный.',
+        )
+        parser.add_argument(
+            '--output',
+            help='Файл для отчёта; по умолчанию отчёт печатается.',
+        )
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as tmp:
+            name = options['db'] or os.path.join(tmp, 'load.sqlite3')
+            with sqlite_default_database(name):
+                seed('default', options['users'], options['groups'],
+                     options['posts'])
+                runner = LoadRunner(
+                    options['scenarios'], options['authenticated'])
+                report = runner.run(
+                    options['requests'], options['concurrency'])
+        report['seed'] = {
+            key: options[key] for key in ('users', 'groups', 'posts')}
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output)
+        else:
+            self.stdout.write(output)
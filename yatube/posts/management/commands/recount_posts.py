@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import recount_posts
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики постов пользователей и групп.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database',
+            default='default',
+            help='Псевдоним базы данных.',
+        )
+
+    def handle(self, *args, **options):
+        recount_posts(using=options['database'])
+        self.stdout.write(self.style.SUCCESS('Счётчики постов пересчитаны.'))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from posts.rendering import RENDER_BATCH_SIZE, rerender_posts
+
+
+class Command(BaseCommand):
+    help = 'Формирует HTML и выдержку текста для сохранённых постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=RENDER_BATCH_SIZE)
+        parser.add_argument(
+            '--missing',
+            action='store_true',
+            help='Обработать только посты без сформированного HTML.',
+        )
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        total = rerender_posts(
+            using=options['database'],
+            batch_size=options['batch_size'],
+            only_missing=options['missing'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'Обработано постов: {total}'))
@@ -0,0 +1,37 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from posts.benchmark import loader_timings, render_timings
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет среднее время рендеринга страницы ленты с холодным '
+        'и прогретым кэшем карточек постов, а с --loaders - '
+        'с загрузчиками шаблонов без кэша и с кэшем.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--template', default='posts/index.html')
+        parser.add_argument('--repeat', type=int, default=100)
+        parser.add_argument(
+            '--text-length',
+            type=int,
+            default=2000,
+            help='Примерная длина текста каждого поста.',
+        )
+        parser.add_argument(
+            '--loaders',
+            action='store_true',
+            help='Сравнить загрузчики шаблонов без кэша и с кэшем.',
+        )
+
+    def handle(self, *args, **options):
+        arguments = (
+            options['template'], options['repeat'], options['text_length'])
+        timings = render_timings(*arguments)
+        if options['loaders']:
+            timings['loaders'] = loader_timings(*arguments)
+        self.stdout.write(json.dumps(timings, indent=2))
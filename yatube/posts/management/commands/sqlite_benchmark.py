@@ -0,0 +1,50 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from posts.benchmark import SCENARIOS, pragma_comparison
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность смешанной нагрузки чтения '
+        'и записи на SQLite с PRAGMA по умолчанию и с SQLITE_PRAGMAS. '
+        'Печатает отчёт в JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--groups', type=int, default=10)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument(
+            '--scenarios',
+            nargs='+',
+            choices=SCENARIOS,
+            default=SCENARIOS,
+        )
+        parser.add_argument(
+            '--anonymous',
+            action='store_true',
+            help='Читать страницы анонимно, через кэш страниц.',
+        )
+
+    def handle(self, *args, **options):
+        results = pragma_comparison(
+            options['users'], options['groups'], options['posts'],
+            options['requests'], options['concurrency'],
+            options['scenarios'], authenticated=not options['anonymous'],
+        )
+        summary = {
+            name: {
+                'rps': report['rps'],
+                'errors': report['errors'],
+                'journal_mode': report['pragmas'].get('journal_mode'),
+            }
+            for name, report in results.items()
+        }
+        self.stdout.write(json.dumps(
+            {'summary': summary, 'reports': results},
+            ensure_ascii=False, indent=2, default=str,
+        ))
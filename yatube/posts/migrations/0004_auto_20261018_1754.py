@@ -0,0 +1,81 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:54
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def recount_posts(apps, schema_editor):
+    """Заполняет счётчики постов групп и пользователей."""
+    using = schema_editor.connection.alias
+    Group = apps.get_model('posts', 'Group')
+    Post = apps.get_model('posts', 'Post')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    UserPostsCounter = apps.get_model('posts', 'UserPostsCounter')
+
+    group_counts = Post.objects.using(using).filter(
+        group=OuterRef('pk')).order_by().values('group').annotate(
+        total=Count('pk')).values('total')
+    Group.objects.using(using).update(posts_count=Coalesce(
+        Subquery(group_counts, output_field=IntegerField()), 0))
+    users = User.objects.using(using).annotate(
+        total=Count('posts')).filter(total__gt=0).values_list('pk', 'total')
+    UserPostsCounter.objects.using(using).bulk_create(
+        UserPostsCounter(user_id=pk, posts_count=total)
+        for pk, total in users.iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0003_auto_20220528_1848'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='post',
+            options={'default_related_name': 'posts', 'ordering': ('-pub_date',), 'verbose_name': 'Пост', 'verbose_name_plural': 'Посты'},
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество постов'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='author',
+            field=models.ForeignKey(help_text='Ну и кто же это придумал?', on_delete=django.db.models.deletion.CASCADE, related_name='posts', to=settings.AUTH_USER_MODEL, verbose_name='Автор'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='group',
+            field=models.ForeignKey(blank=True, help_text='В каком сообществе опубликовать?', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='posts', to='posts.Group', verbose_name='Сообщество'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='pub_date',
+            field=models.DateTimeField(auto_now_add=True, help_text='Когда высказана мысль', verbose_name='Дата публикации'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='text',
+            field=models.TextField(help_text='Выскажи свои мысли здесь', verbose_name='Текст'),
+        ),
+        migrations.CreateModel(
+            name='UserPostsCounter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Количество постов')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='posts_counter', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Счётчик постов пользователя',
+                'verbose_name_plural': 'Счётчики постов пользователей',
+            },
+        ),
+        migrations.RunPython(recount_posts, migrations.RunPython.noop),
+    ]
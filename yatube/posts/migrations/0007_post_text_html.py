@@ -0,0 +1,47 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:01
+
+from django.db import migrations, models
+from django.utils.html import linebreaks
+from django.utils.text import Truncator
+
+BATCH_SIZE = 500
+EXCERPT_LENGTH = 30
+
+
+def render_posts(apps, schema_editor):
+    """Заполняет HTML и выдержку текста существующих постов."""
+    using = schema_editor.connection.alias
+    Post = apps.get_model('posts', 'Post')
+    posts = Post.objects.using(using).order_by('pk').only('pk', 'text')
+    last_pk = 0
+    while True:
+        batch = list(posts.filter(pk__gt=last_pk)[:BATCH_SIZE])
+        if not batch:
+            return
+        for post in batch:
+            post.text_html = linebreaks(post.text, autoescape=True)
+            post.excerpt = Truncator(post.text).chars(EXCERPT_LENGTH)
+        Post.objects.using(using).bulk_update(
+            batch, ('text_html', 'excerpt'))
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_post_edited'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=30, verbose_name='Выдержка'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='HTML текста'),
+        ),
+        migrations.RunPython(render_posts, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
-from .constants import LEN_STR
+from .constants import EXCERPT_LENGTH, LEN_STR
+from .rendering import render_text
 
 User = get_user_model()
 
@@ -14,7 +15,8 @@ class Group(models.Model):
     Имеет следующие параметры:
     title - Наименование тематической группы,
     slug - значение, необходимое для формирования URL-адреса группы,
-    description - описание (в том числе различные правила) тематической группы.
+    description - описание (в том числе различные правила) тематической группы,
+    posts_count - количество постов в группе, поддерживается сигналами.
     """
 
     title = models.CharField(
@@ -28,6 +30,11 @@ class Group(models.Model):
     description = models.TextField(
         verbose_name='Описание',
     )
+    posts_count = models.PositiveIntegerField(
+        verbose_name='Количество постов',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = 'Группа'
@@ -42,9 +49,14 @@ class Post(models.Model):
     Класс Post предназначен для создания публикаций пользователей.
     Имеет следующие параметры:
     text - текст публикации,
+    text_html - HTML текста, формируется при сохранении,
+    excerpt - краткая выдержка из текста,
     pub_date - дата публикации,
+    edited - дата последнего изменения, служит версией поста,
     author - автор публикации,
     group - тематическая группа, к которой относится публикация,
+    image - изображение, миниатюры для лент готовит фоновый обработчик,
+    fanned_out - пост разослан в ленты подписчиков,
     LEN_STR - длина поста для вывода в консоль.
     """
 
@@ -52,11 +64,26 @@ class Post(models.Model):
         verbose_name='Текст',
         help_text='Выскажи свои мысли здесь',
     )
+    text_html = models.TextField(
+        verbose_name='HTML текста',
+        blank=True,
+        editable=False,
+    )
+    excerpt = models.CharField(
+        verbose_name='Выдержка',
+        max_length=EXCERPT_LENGTH,
+        blank=True,
+        editable=False,
+    )
     pub_date = models.DateTimeField(
         verbose_name='Дата публикации',
         help_text='Когда высказана мысль',
         auto_now_add=True,
     )
+    edited = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True,
+    )
     author = models.ForeignKey(
         User,
         verbose_name='Автор',
@@ -71,12 +98,182 @@ class Post(models.Model):
         on_delete=models.SET_NULL,
         help_text='В каком сообществе опубликовать?',
     )
+    image = models.ImageField(
+        verbose_name='Картинка',
+        upload_to='posts/',
+        blank=True,
+    )
+    fanned_out = models.BooleanField(
+        verbose_name='Разослан подписчикам',
+        default=False,
+        editable=False,
+    )
 
     class Meta:
-        ordering = ('-pub_date', )
+        ordering = ('-pub_date', '-id')
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'),
+                name='post_pub_date_id_idx',
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='post_author_pub_date_idx',
+            ),
+            models.Index(
+                fields=('group', '-pub_date', '-id'),
+                name='post_group_pub_date_idx',
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='post_not_fanned_out_idx',
+                condition=models.Q(fanned_out=False),
+            ),
+        )
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
         default_related_name = 'posts'
 
     def __str__(self):
         return self.text[:LEN_STR]
+
+    def save(self, *args, **kwargs):
+        self.text_html, self.excerpt = render_text(self.text)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'text' in update_fields:
+            kwargs['update_fields'] = {
+                *update_fields, 'text_html', 'excerpt'}
+        super().save(*args, **kwargs)
+
+
+class UserPostsCounter(models.Model):
+    """
+    Класс UserPostsCounter хранит количество постов пользователя,
+    чтобы страницы профиля и поста не выполняли COUNT при выводе.
+    Имеет следующие параметры:
+    user - пользователь,
+    posts_count - количество его постов, поддерживается сигналами.
+    """
+
+    user = models.OneToOneField(
+        User,
+        verbose_name='Пользователь',
+        on_delete=models.CASCADE,
+        related_name='posts_counter',
+    )
+    posts_count = models.PositiveIntegerField(
+        verbose_name='Количество постов',
+        default=0,
+    )
+
+    class Meta:
+        verbose_name = 'Счётчик постов пользователя'
+        verbose_name_plural = 'Счётчики постов пользователей'
+
+    def __str__(self):
+        return f'{self.user}: {self.posts_count}'
+
+    @classmethod
+    def get_count(cls, user):
+        """Количество постов пользователя без обращения к таблице постов."""
+        try:
+            return user.posts_counter.posts_count
+        except cls.DoesNotExist:
+            return 0
+
+
+class Follow(models.Model):
+    """
+    Класс Follow описывает подписку пользователя на автора.
+    Имеет следующие параметры:
+    user - подписчик,
+    author - автор, на которого подписан пользователь.
+    """
+
+    user = models.ForeignKey(
+        User,
+        verbose_name='Подписчик',
+        on_delete=models.CASCADE,
+        related_name='follower',
+    )
+    author = models.ForeignKey(
+        User,
+        verbose_name='Автор',
+        on_delete=models.CASCADE,
+        related_name='following',
+    )
+
+    class Meta:
+        verbose_name = 'Подписка'
+        verbose_name_plural = 'Подписки'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'author'),
+                name='unique_follow',
+            ),
+            models.CheckConstraint(
+                check=~models.Q(user=models.F('author')),
+                name='prevent_self_follow',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.user} -> {self.author}'
+
+
+class TimelineEntry(models.Model):
+    """
+    Класс TimelineEntry - запись материализованной ленты подписок.
+    Создаётся для каждого подписчика при публикации поста
+    (fan-out on write), поэтому лента читается без JOIN подписок.
+    Имеет следующие параметры:
+    user - владелец ленты,
+    post - пост в ленте,
+    author - автор поста, нужен для очистки ленты при отписке,
+    pub_date - дата публикации поста, ключ сортировки ленты.
+    """
+
+    user = models.ForeignKey(
+        User,
+        verbose_name='Пользователь',
+        on_delete=models.CASCADE,
+        related_name='timeline',
+    )
+    post = models.ForeignKey(
+        Post,
+        verbose_name='Пост',
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+    )
+    author = models.ForeignKey(
+        User,
+        verbose_name='Автор',
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации',
+    )
+
+    class Meta:
+        verbose_name = 'Запись ленты подписок'
+        verbose_name_plural = 'Записи ленты подписок'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'post'),
+                name='unique_timeline_entry',
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', '-pub_date', '-post'),
+                name='timeline_user_pub_date_idx',
+            ),
+            models.Index(
+                fields=('user', 'author'),
+                name='timeline_user_author_idx',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.user}: {self.post}'
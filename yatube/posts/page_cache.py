@@ -0,0 +1,101 @@
+import hashlib
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+
+from core.timing import record_cache
+
+
+def page_cache():
+    return caches[settings.PAGE_CACHE_ALIAS]
+
+
+def scope_key(scope):
+    """Область в ключе кэша: адрес группы и имя автора могут
+    содержать символы, недопустимые в ключах memcached."""
+    return hashlib.md5(scope.encode()).hexdigest()
+
+
+def scope_version_key(scope):
+    return f'page:version:{scope_key(scope)}'
+
+
+def get_scope_version(scope):
+    """Текущая версия области кэша (лента index, группы или автора)."""
+    key = scope_version_key(scope)
+    version = page_cache().get(key)
+    if version is None:
+        page_cache().add(key, uuid.uuid4().hex, None)
+        version = page_cache().get(key)
+    return version
+
+
+def invalidate_scopes(scopes):
+    """Сбрасывает все закэшированные страницы перечисленных областей:
+    ключи старой версии становятся недостижимыми и вытесняются."""
+    page_cache().set_many(
+        {scope_version_key(scope): uuid.uuid4().hex for scope in scopes},
+        None,
+    )
+
+
+def post_scopes(posts):
+    """Области кэша страниц лент, в которые попадают посты posts:
+    главная, их авторы и группы."""
+    scopes = {'index'}
+    rows = posts.values_list('author__username', 'group__slug').distinct()
+    for username, slug in rows:
+        scopes.add(f'author:{username}')
+        if slug is not None:
+            scopes.add(f'group:{slug}')
+    return scopes
+
+
+def page_cache_key(request, scope):
+    page = request.GET.get('page', '')
+    cursor = request.GET.get('cursor', '')
+    raw = f'{request.path}|{page}|{cursor}'
+    digest = hashlib.md5(raw.encode()).hexdigest()
+    return f'page:{scope_key(scope)}:{get_scope_version(scope)}:{digest}'
+
+
+def cache_anonymous_page(scope_func):
+    """
+    Декоратор кэширует страницу ленты целиком для анонимных
+    пользователей. scope_func по аргументам view возвращает
+    область кэша, которую сбрасывают сигналы постов. ETag страницы
+    хранится вместе с ней, поэтому условный GET из кэша отвечает
+    304 без запросов к базе.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (request.method not in ('GET', 'HEAD')
+                    or request.user.is_authenticated):
+                return view(request, *args, **kwargs)
+            key = page_cache_key(request, scope_func(*args, **kwargs))
+            cached = page_cache().get(key)
+            record_cache('page', cached is not None)
+            if cached is not None:
+                content, content_type, etag = cached
+                response = HttpResponse(content, content_type=content_type)
+                if etag is None:
+                    return response
+                response['ETag'] = etag
+                return get_conditional_response(
+                    request, etag=etag, response=response)
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200:
+                page_cache().set(
+                    key,
+                    (response.content, response['Content-Type'],
+                     response.get('ETag')),
+                    settings.PAGE_CACHE_TIMEOUT,
+                )
+            return response
+        return wrapper
+    return decorator
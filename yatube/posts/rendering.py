@@ -0,0 +1,42 @@
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils.html import linebreaks
+from django.utils.text import Truncator
+
+from .constants import EXCERPT_LENGTH
+
+RENDER_BATCH_SIZE: int = 500
+
+
+def render_text(text):
+    """Возвращает HTML текста поста (абзацы и переносы строк,
+    с экранированием) и его краткую выдержку."""
+    return (
+        linebreaks(text, autoescape=True),
+        Truncator(text).chars(EXCERPT_LENGTH),
+    )
+
+
+def rerender_posts(using=DEFAULT_DB_ALIAS, batch_size=RENDER_BATCH_SIZE,
+                   only_missing=False):
+    """
+    Заново формирует HTML и выдержку для постов пачками.
+    Возвращает количество обработанных постов.
+    """
+    from .models import Post
+
+    posts = Post.objects.using(using).order_by('pk').only('pk', 'text')
+    if only_missing:
+        posts = posts.filter(text_html='')
+    total = 0
+    last_pk = 0
+    while True:
+        batch = list(posts.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return total
+        for post in batch:
+            post.text_html, post.excerpt = render_text(post.text)
+        with transaction.atomic(using=using):
+            Post.objects.using(using).bulk_update(
+                batch, ('text_html', 'excerpt'))
+        total += len(batch)
+        last_pk = batch[-1].pk
@@ -0,0 +1,126 @@
+import re
+
+from django.db import connections
+
+from .models import Post
+
+POSTS_TABLE = Post._meta.db_table
+FTS_TABLE = f'{POSTS_TABLE}_fts'
+
+FTS_TRIGGERS = {
+    f'{FTS_TABLE}_insert': f'''
+        CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT ON {POSTS_TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+        END
+    ''',
+    f'{FTS_TABLE}_delete': f'''
+        CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE ON {POSTS_TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+            VALUES ('delete', old.id, old.text);
+        END
+    ''',
+    f'{FTS_TABLE}_update': f'''
+        CREATE TRIGGER {FTS_TABLE}_update AFTER UPDATE OF text ON {POSTS_TABLE}
+        BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+            VALUES ('delete', old.id, old.text);
+            INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+        END
+    ''',
+}
+
+WORD_RE = re.compile(r'\w+')
+
+
+def uses_fts(using):
+    return connections[using].vendor == 'sqlite'
+
+
+def ensure_search_index(using):
+    """
+    Создаёт полнотекстовый индекс FTS5 по тексту постов и триггеры,
+    которые поддерживают его при вставке, изменении и удалении строк.
+    SQLite пересоздаёт таблицу при изменении её схемы и теряет
+    триггеры, поэтому функция вызывается после каждой миграции и
+    перестраивает индекс, если триггеры пришлось создавать заново.
+    """
+    connection = connections[using]
+    if not uses_fts(using) or (
+            POSTS_TABLE not in connection.introspection.table_names()):
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+            'AND tbl_name = %s', [POSTS_TABLE])
+        existing = {row[0] for row in cursor.fetchall()}
+        if existing.issuperset(FTS_TRIGGERS):
+            return
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+            f"text, content='{POSTS_TABLE}', content_rowid='id')")
+        for name, sql in FTS_TRIGGERS.items():
+            if name not in existing:
+                cursor.execute(sql)
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def query_terms(query):
+    """Слова запроса; служебный синтаксис FTS5 отбрасывается."""
+    return WORD_RE.findall(query.lower())
+
+
+class SearchResults:
+    """
+    Результаты поиска, отсортированные по релевантности (bm25).
+    Поддерживает count() и срезы, поэтому передаётся в Paginator:
+    каждая страница - это один запрос идентификаторов к индексу
+    и один запрос самих постов.
+    """
+
+    def __init__(self, query, using='default'):
+        self.terms = query_terms(query)
+        self.using = using
+
+    def match_expression(self):
+        return ' '.join(f'"{term}"' for term in self.terms)
+
+    def fallback_queryset(self):
+        posts = Post.objects.using(self.using)
+        for term in self.terms:
+            posts = posts.filter(text__icontains=term)
+        return posts
+
+    def count(self):
+        if not self.terms:
+            return 0
+        if not uses_fts(self.using):
+            return self.fallback_queryset().count()
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(
+                f'SELECT COUNT(*) FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s',
+                [self.match_expression()])
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            return self[item:item + 1][0]
+        if not self.terms:
+            return []
+        if not uses_fts(self.using):
+            return list(self.fallback_queryset().select_related(
+                'author', 'group')[item])
+        start = item.start or 0
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                'ORDER BY rank LIMIT %s OFFSET %s',
+                [self.match_expression(), item.stop - start, start])
+            ids = [row[0] for row in cursor.fetchall()]
+        found = Post.objects.using(self.using).select_related(
+            'author', 'group').in_bulk(ids)
+        return [found[pk] for pk in ids if pk in found]
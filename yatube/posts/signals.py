@@ -0,0 +1,162 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import (post_delete, post_init, post_migrate,
+                                      post_save, pre_delete)
+from django.dispatch import receiver
+
+from .counters import change_posts_count
+from .models import Group, Post, User
+from .page_cache import invalidate_scopes, post_scopes
+from .search import ensure_search_index
+from .thumbnails import feed_thumbnail
+from .timeline import fan_out_post
+from .utils import count_cache_key
+
+AUTHOR_NAME_FIELDS = ('username', 'first_name', 'last_name')
+
+
+def feed_keys(post):
+    """Ключи лент, в которые попадает пост."""
+    keys = {'index', f'author:{post.author_id}'}
+    for group_id in (post.group_id, post._initial_group_id):
+        if group_id is not None:
+            keys.add(f'group:{group_id}')
+    return keys
+
+
+@receiver(post_init, sender=Post)
+def remember_initial_group(sender, instance, **kwargs):
+    """Запоминает исходную группу поста, чтобы при её смене
+    сбросить данные обеих групп."""
+    instance._initial_group_id = instance.group_id
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_feed_counts(sender, instance, **kwargs):
+    """Сбрасывает закэшированное количество постов в лентах."""
+    cache.delete_many(
+        [count_cache_key(key) for key in feed_keys(instance)])
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_feed_pages(sender, instance, **kwargs):
+    """Сбрасывает кэш страниц лент, в которые попадает пост:
+    главной, автора и его групп (в том числе прежней)."""
+    group_ids = {instance.group_id, instance._initial_group_id} - {None}
+    slugs = Group.objects.filter(pk__in=group_ids).values_list(
+        'slug', flat=True) if group_ids else ()
+    invalidate_scopes(
+        ['index', f'author:{instance.author.username}']
+        + [f'group:{slug}' for slug in slugs]
+    )
+
+
+@receiver(post_init, sender=Group)
+def remember_initial_slug(sender, instance, **kwargs):
+    """Запоминает адрес группы, чтобы при его смене сбросить
+    страницы по прежнему адресу."""
+    instance._initial_slug = instance.__dict__.get('slug')
+
+
+@receiver(post_save, sender=Group)
+def invalidate_group_pages(sender, instance, created, **kwargs):
+    """Сбрасывает кэш страниц группы при изменении её названия или
+    описания. При смене адреса группы сбрасываются и ленты с её
+    постами: карточки ссылаются на группу."""
+    initial_slug = getattr(instance, '_initial_slug', None)
+    scopes = {f'group:{instance.slug}'}
+    if not created and initial_slug != instance.slug:
+        scopes |= post_scopes(instance.posts.all())
+        if initial_slug is not None:
+            scopes.add(f'group:{initial_slug}')
+    invalidate_scopes(scopes)
+    instance._initial_slug = instance.slug
+
+
+@receiver(pre_delete, sender=Group)
+def remember_group_scopes(sender, instance, **kwargs):
+    """Запоминает ленты с постами группы: удаление отвяжет посты
+    от неё запросом UPDATE, который не посылает сигналы постов."""
+    instance._deleted_scopes = post_scopes(instance.posts.all()) | {
+        f'group:{instance.slug}'}
+
+
+@receiver(post_delete, sender=Group)
+def invalidate_deleted_group_pages(sender, instance, **kwargs):
+    """Сбрасывает кэш страниц и количество постов лент, в которых
+    были посты удалённой группы."""
+    invalidate_scopes(getattr(
+        instance, '_deleted_scopes', {f'group:{instance.slug}'}))
+    cache.delete(count_cache_key(f'group:{instance.pk}'))
+
+
+def author_name(user):
+    """Поля пользователя, которые выводятся в лентах."""
+    return tuple(user.__dict__.get(field) for field in AUTHOR_NAME_FIELDS)
+
+
+@receiver(post_init, sender=User)
+def remember_initial_name(sender, instance, **kwargs):
+    """Запоминает имя пользователя, чтобы при его смене сбросить
+    ленты с его постами."""
+    instance._initial_name = author_name(instance)
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_pages(sender, instance, created, update_fields,
+                            **kwargs):
+    """Сбрасывает кэш страниц лент с постами пользователя, когда
+    меняется его имя, которое выводится в карточках постов.
+    Сохранение, например, только даты входа ленты не трогает."""
+    initial_name = getattr(instance, '_initial_name', None)
+    if (created or initial_name == author_name(instance)
+            or update_fields is not None
+            and not set(update_fields) & set(AUTHOR_NAME_FIELDS)):
+        return
+    scopes = post_scopes(instance.posts.all())
+    scopes.add(f'author:{instance.username}')
+    if initial_name is not None:
+        scopes.add(f'author:{initial_name[0]}')
+    invalidate_scopes(scopes)
+    instance._initial_name = author_name(instance)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_new_post(sender, instance, created, **kwargs):
+    """Раскладывает новый пост по лентам подписчиков."""
+    if created:
+        fan_out_post(instance)
+
+
+@receiver(post_save, sender=Post)
+def prepare_thumbnails(sender, instance, **kwargs):
+    """Ставит в очередь миниатюру изображения поста, если её ещё нет,
+    чтобы лента не ждала её при первом выводе."""
+    if instance.image:
+        transaction.on_commit(lambda: feed_thumbnail(instance.image))
+
+
+@receiver(post_save, sender=Post)
+def update_counters_on_save(sender, instance, created, **kwargs):
+    """Поддерживает счётчики постов автора и групп."""
+    if created:
+        change_posts_count(instance.author_id, instance.group_id)
+    elif instance.group_id != instance._initial_group_id:
+        change_posts_count(group_id=instance._initial_group_id, delta=-1)
+        change_posts_count(group_id=instance.group_id)
+    instance._initial_group_id = instance.group_id
+
+
+@receiver(post_delete, sender=Post)
+def update_counters_on_delete(sender, instance, **kwargs):
+    """Уменьшает счётчики постов автора и группы удалённого поста."""
+    change_posts_count(instance.author_id, instance.group_id, delta=-1)
+
+
+@receiver(post_migrate)
+def create_search_index(sender, using, **kwargs):
+    """Поддерживает полнотекстовый индекс постов после миграций."""
+    if sender.label == 'posts':
+        ensure_search_index(using)
@@ -0,0 +1,11 @@
+from django import template
+
+from ..thumbnails import feed_thumbnail as get_feed_thumbnail
+
+register = template.Library()
+
+
+@register.simple_tag
+def feed_thumbnail(image):
+    """Готовая миниатюра изображения для ленты или None."""
+    return get_feed_thumbnail(image)
@@ -0,0 +1,94 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from ..constants import POSTS_AMOUNT
+from ..models import Group, Post, User
+
+
+class PostApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        for i in range(POSTS_AMOUNT + 3):
+            cls.post = Post.objects.create(
+                text=f'Тестовый текст {i}',
+                author=cls.author,
+                group=cls.group if i % 2 else None,
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def get_json(self, address, **extra):
+        response = self.client.get(address, **extra)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return response, response.json()
+
+    def test_feeds(self):
+        """Ленты отдают посты в порядке публикации."""
+        feeds = {
+            reverse('posts:api_index'): POSTS_AMOUNT,
+            reverse('posts:api_group', kwargs={'slug': self.group.slug}): 6,
+            reverse(
+                'posts:api_profile', kwargs={'username': self.author}
+            ): POSTS_AMOUNT,
+        }
+        for address, expected in feeds.items():
+            with self.subTest(address=address):
+                _, data = self.get_json(address)
+                self.assertEqual(len(data['results']), expected)
+                self.assertEqual(data['results'][0]['author'], 'TestAuthor')
+
+    def test_cursor_pagination(self):
+        """Курсор next ведёт на следующую страницу, limit задаёт её
+        размер."""
+        address = reverse('posts:api_index')
+        _, first = self.get_json(address + '?limit=5')
+        _, second = self.get_json(
+            f'{address}?limit=5&cursor={first["next"]}')
+        self.assertEqual(len(first['results']), 5)
+        self.assertIsNone(first['previous'])
+        self.assertEqual(
+            second['results'][0]['id'], first['results'][-1]['id'] - 1)
+        self.assertIsNotNone(second['previous'])
+
+    def test_etag(self):
+        """Повторный запрос с If-None-Match получает 304, пока пост
+        не изменён."""
+        address = reverse('posts:api_index')
+        response, _ = self.get_json(address)
+        etag = response['ETag']
+        cached = self.client.get(address, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached.status_code, HTTPStatus.NOT_MODIFIED)
+        self.post.text = 'Изменённый текст'
+        self.post.save()
+        response, data = self.get_json(address, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(data['results'][0]['text'], 'Изменённый текст')
+
+    def test_post_detail(self):
+        """Детальная страница и 404 для несуществующих объектов."""
+        address = reverse('posts:api_post', kwargs={'post_id': self.post.pk})
+        response = self.client.get(address)
+        self.assertEqual(response.json()['id'], self.post.pk)
+        cached = self.client.get(
+            address, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, HTTPStatus.NOT_MODIFIED)
+        missing = (
+            reverse('posts:api_post', kwargs={'post_id': 0}),
+            reverse('posts:api_group', kwargs={'slug': 'missing'}),
+            reverse('posts:api_profile', kwargs={'username': 'missing'}),
+        )
+        for address in missing:
+            with self.subTest(address=address):
+                self.assertEqual(
+                    self.client.get(address).status_code,
+                    HTTPStatus.NOT_FOUND)
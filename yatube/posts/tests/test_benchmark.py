@@ -0,0 +1,29 @@
+from django.test import TestCase
+
+from ..benchmark import SCENARIOS, LoadRunner, percentile, seed
+
+
+class LoadRunnerTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        seed('default', users=3, groups=2, posts=30)
+
+    def test_percentile(self):
+        """Перцентили считаются методом ближайшего ранга."""
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 95), 7)
+        self.assertIsNone(percentile([], 50))
+
+    def test_scenarios_succeed(self):
+        """Каждый сценарий нагрузки выполняется без ошибок
+        и учитывает запросы к базе."""
+        runner = LoadRunner(authenticated=True)
+        for number, scenario in enumerate(SCENARIOS):
+            with self.subTest(scenario=scenario):
+                name, elapsed, queries, ok = runner.measure(number)
+                self.assertEqual(name, scenario)
+                self.assertTrue(ok)
+                self.assertGreater(queries, 0)
@@ -0,0 +1,97 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Group, Post, User
+
+
+class PostFeedsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='TestAuthor', first_name='Имя', last_name='Фамилия')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый текст поста',
+            author=cls.author,
+            group=cls.group,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feeds(self):
+        """Ленты RSS и Atom содержат пост, его автора и ссылку."""
+        feeds = {
+            reverse('posts:feed_rss'): 'application/rss+xml',
+            reverse('posts:feed_atom'): 'application/atom+xml',
+            reverse('posts:group_rss', kwargs={'slug': self.group.slug}):
+                'application/rss+xml',
+            reverse('posts:group_atom', kwargs={'slug': self.group.slug}):
+                'application/atom+xml',
+            reverse('posts:profile_rss', kwargs={'username': self.author}):
+                'application/rss+xml',
+            reverse('posts:profile_atom', kwargs={'username': self.author}):
+                'application/atom+xml',
+        }
+        link = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        for address, content_type in feeds.items():
+            with self.subTest(address=address):
+                response = self.client.get(address)
+                self.assertTrue(response['Content-Type'].startswith(
+                    content_type))
+                self.assertContains(response, 'Тестовый текст поста')
+                self.assertContains(response, 'Имя Фамилия')
+                self.assertContains(response, link)
+
+    def test_feeds_for_logged_in_user_fit_query_budget(self):
+        """Ленты для вошедшего пользователя укладываются в бюджет
+        запросов, даже когда сессии и пользователя нет в кэше."""
+        self.client.force_login(self.author)
+        addresses = (
+            reverse('posts:feed_rss'),
+            reverse('posts:group_atom', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile_rss', kwargs={'username': self.author}),
+        )
+        for address in addresses:
+            with self.subTest(address=address):
+                cache.clear()
+                response = self.client.get(address)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertLessEqual(
+                    response.query_count,
+                    response.wsgi_request.query_budget,
+                )
+
+    def test_missing_object(self):
+        """Лента несуществующей группы или автора - 404."""
+        addresses = (
+            reverse('posts:group_rss', kwargs={'slug': 'missing'}),
+            reverse('posts:profile_atom', kwargs={'username': 'missing'}),
+        )
+        for address in addresses:
+            with self.subTest(address=address):
+                self.assertEqual(
+                    self.client.get(address).status_code,
+                    HTTPStatus.NOT_FOUND)
+
+    def test_feed_cached_until_post_change(self):
+        """Лента берётся из кэша без запросов к базе, отвечает 304 по
+        ETag и обновляется после нового поста."""
+        address = reverse('posts:group_atom', kwargs={'slug': self.group.slug})
+        etag = self.client.get(address)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(address, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        Post.objects.create(
+            text='Новый пост группы', author=self.author, group=self.group)
+        response = self.client.get(address, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, 'Новый пост группы')
@@ -1,8 +1,28 @@
-from django.test import Client, TestCase
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
 from ..forms import PostForm
-from ..models import Group, Post, User
+from ..models import (Follow, Group, Post, TimelineEntry, User,
+                      UserPostsCounter)
+from ..thumbnails import worker
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
 
 
 class PostFormTests(TestCase):
@@ -47,6 +67,26 @@ class PostFormTests(TestCase):
             ).exists()
         )
 
+    def test_first_post_to_followers_fits_query_budget(self):
+        """Первый пост нового автора с подписчиками в группу
+        укладывается в бюджет запросов при пустом кэше."""
+        author = User.objects.create_user(username='NewAuthor')
+        Follow.objects.create(user=self.author, author=author)
+        client = Client()
+        client.force_login(author)
+        cache.clear()
+        response = client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Первый пост', 'group': self.group.pk},
+        )
+        self.assertRedirects(response, reverse(
+            'posts:profile', kwargs={'username': author.username}))
+        self.assertLessEqual(
+            response.query_count, response.wsgi_request.query_budget)
+        self.assertEqual(UserPostsCounter.get_count(author), 1)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.author, post__author=author).exists())
+
     def test_author_user_edit_post(self):
         """Проверка изменения поста при его редактировании автором."""
         form_data = {
@@ -61,3 +101,84 @@ class PostFormTests(TestCase):
         self.assertEqual(
             Post.objects.get(pk=self.post.id).text, form_data['text']
         )
+
+    def test_author_moves_post_to_another_group(self):
+        """Перенос поста в другую группу укладывается в бюджет
+        запросов view, даже когда сессии и пользователя нет в кэше."""
+        other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Другое описание',
+        )
+        cache.clear()
+        response = self.authorized_client.post(
+            reverse('posts:post_edit', args=(self.post.id,)),
+            data={'text': 'Перенесённый пост', 'group': other_group.pk},
+        )
+        self.assertRedirects(response, reverse(
+            'posts:post_detail', args=(self.post.id,)))
+        self.assertLessEqual(
+            response.query_count, response.wsgi_request.query_budget)
+        self.assertEqual(
+            Post.objects.get(pk=self.post.id).group, other_group)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKER=False)
+class PostImageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='ImageAuthor')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.author)
+
+    def tearDown(self):
+        worker.drain()
+
+    def create_post(self, name):
+        return self.client.post(
+            reverse('posts:post_create'),
+            data={
+                'text': 'Пост с картинкой',
+                'image': SimpleUploadedFile(name, SMALL_GIF, 'image/gif'),
+            },
+        )
+
+    def test_create_post_with_image(self):
+        """Картинка сохраняется в MEDIA_ROOT вместе с постом."""
+        self.create_post('small.gif')
+        post = Post.objects.get(author=self.author)
+        self.assertEqual(post.image.name, 'posts/small.gif')
+        self.assertTrue(post.image.storage.exists(post.image.name))
+
+    def test_image_size_limit(self):
+        """Слишком большая картинка не проходит проверку формы."""
+        with mock.patch('posts.forms.POST_IMAGE_MAX_SIZE', 10):
+            response = self.create_post('large.gif')
+        self.assertFormError(
+            response, 'form', 'image',
+            'Размер картинки не должен превышать 10\xa0байт')
+        self.assertFalse(Post.objects.filter(author=self.author).exists())
+
+    def test_thumbnail_rendered_after_background_job(self):
+        """Лента не создаёт миниатюру сама: до выполнения задания
+        выводится исходная картинка, после - миниатюра."""
+        self.create_post('feed.gif')
+        post = Post.objects.get(author=self.author)
+        self.client.logout()
+
+        content = self.client.get(reverse('posts:index')).content.decode()
+        self.assertIn(post.image.url, content)
+        self.assertEqual(worker.jobs.qsize(), 1)
+
+        worker.drain()
+        content = self.client.get(reverse('posts:index')).content.decode()
+        self.assertNotIn(post.image.url, content)
+        self.assertIn('width="960" height="339"', content)
@@ -0,0 +1,26 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..benchmark import is_index_ordered, query_plans, seed
+
+
+class PostIndexesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        seed('default', users=5, groups=3, posts=300)
+
+    def test_feed_queries_use_index_order(self):
+        """Запросы лент сортируются по индексу, без временной сортировки."""
+        for view, plan in query_plans('default').items():
+            with self.subTest(view=view):
+                self.assertTrue(is_index_ordered(plan), plan)
+
+    def test_feed_query_plans_command(self):
+        """Команда мигрирует и наполняет отдельную базу SQLite."""
+        out = StringIO()
+        call_command(
+            'feed_query_plans', posts=100, users=3, groups=2, stdout=out)
+        self.assertIn('index_ordered', out.getvalue())
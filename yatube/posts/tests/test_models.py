@@ -1,7 +1,11 @@
+from io import StringIO
+
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils.text import Truncator
 
 from ..constants import LEN_STR
-from ..models import Group, Post, User
+from ..models import Group, Post, User, UserPostsCounter
 
 
 class PostModelTest(TestCase):
@@ -60,3 +64,98 @@ class PostModelTest(TestCase):
             with self.subTest(field=field):
                 self.assertEqual(
                     post._meta.get_field(field).help_text, expected_value)
+
+
+class PostsCounterTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Тестовое описание',
+        )
+
+    def assert_counts(self, user_count, group_count, other_group_count):
+        self.group.refresh_from_db()
+        self.other_group.refresh_from_db()
+        self.assertEqual(UserPostsCounter.get_count(
+            User.objects.get(pk=self.user.pk)), user_count)
+        self.assertEqual(self.group.posts_count, group_count)
+        self.assertEqual(self.other_group.posts_count, other_group_count)
+
+    def test_counters_follow_post_changes(self):
+        """Счётчики постов меняются при создании, смене группы
+        и удалении поста."""
+        post = Post.objects.create(
+            text='Тестовый пост', author=self.user, group=self.group)
+        self.assert_counts(1, 1, 0)
+        post = Post.objects.get(pk=post.pk)
+        post.group = self.other_group
+        post.save()
+        self.assert_counts(1, 0, 1)
+        post.delete()
+        self.assert_counts(0, 0, 0)
+
+    def test_user_with_posts_deleted(self):
+        """Удаление пользователя с постами не ломает счётчики:
+        каскад удаляет его счётчик раньше постов."""
+        author = User.objects.create_user(username='leaving')
+        for _ in range(2):
+            Post.objects.create(
+                text='Тестовый пост', author=author, group=self.group)
+        author.delete()
+        self.assertFalse(
+            UserPostsCounter.objects.filter(user_id=author.pk).exists())
+        self.assert_counts(0, 0, 0)
+
+    def test_recount_posts_command(self):
+        """Команда recount_posts восстанавливает счётчики."""
+        Post.objects.bulk_create([
+            Post(text='Тестовый пост', author=self.user, group=self.group)
+            for _ in range(3)
+        ])
+        self.assert_counts(0, 0, 0)
+        call_command('recount_posts', stdout=StringIO())
+        self.assert_counts(3, 3, 0)
+
+
+class PostRenderedTextTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    def test_text_html_rendered_on_save(self):
+        """HTML и выдержка текста формируются при сохранении поста."""
+        post = Post.objects.create(
+            author=self.user, text='Первый <b>абзац</b>\n\nВторой' * 3)
+        self.assertEqual(
+            post.text_html,
+            '<p>Первый &lt;b&gt;абзац&lt;/b&gt;</p>\n\n'
+            '<p>ВторойПервый &lt;b&gt;абзац&lt;/b&gt;</p>\n\n'
+            '<p>ВторойПервый &lt;b&gt;абзац&lt;/b&gt;</p>\n\n'
+            '<p>Второй</p>',
+        )
+        self.assertEqual(post.excerpt, Truncator(post.text).chars(30))
+        post.text = 'Новый текст'
+        post.save(update_fields=['text'])
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, '<p>Новый текст</p>')
+        self.assertEqual(post.excerpt, 'Новый текст')
+
+    def test_render_posts_command(self):
+        """Команда render_posts заполняет HTML постов,
+        созданных в обход save()."""
+        Post.objects.bulk_create([
+            Post(author=self.user, text=f'Текст {i}') for i in range(3)])
+        call_command('render_posts', '--missing', stdout=StringIO())
+        for post in Post.objects.all():
+            with self.subTest(post=post):
+                self.assertEqual(post.text_html, f'<p>{post.text}</p>')
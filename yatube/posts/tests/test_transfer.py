@@ -0,0 +1,77 @@
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db.models.sql.compiler import SQLInsertCompiler
+from django.test import TestCase
+
+from ..models import Group, Post, UserPostsCounter
+
+
+class PostTransferTest(TestCase):
+
+    RECORDS = (
+        '{"type": "group", "slug": "imported", "title": "Импорт"}\n'
+        '{"author": "writer", "group": "imported", "text": "Первый пост", '
+        '"pub_date": "2020-01-01T10:00:00+00:00"}\n'
+        '{"author": "writer", "text": "Второй пост", '
+        '"pub_date": "2020-01-02T10:00:00+00:00"}\n'
+    )
+
+    def import_records(self, content, *args):
+        with tempfile.NamedTemporaryFile(
+                'w', suffix=args[0] if args else '.jsonl',
+                delete=False) as source:
+            source.write(content)
+        self.addCleanup(os.remove, source.name)
+        call_command('import_posts', source.name, '--batch-size', '1',
+                     stdout=StringIO())
+
+    def test_import_creates_posts(self):
+        """Импорт создаёт авторов, группы и посты с датами из файла,
+        формирует HTML и пересчитывает счётчики."""
+        self.import_records(self.RECORDS)
+        group = Group.objects.get(slug='imported')
+        post = Post.objects.get(group=group)
+        self.assertEqual(group.title, 'Импорт')
+        self.assertEqual(post.author.username, 'writer')
+        self.assertEqual(post.pub_date.year, 2020)
+        self.assertEqual(post.text_html, '<p>Первый пост</p>')
+        self.assertEqual(group.posts_count, 1)
+        self.assertEqual(UserPostsCounter.get_count(post.author), 2)
+
+    def test_import_keeps_model_date_fields(self):
+        """Импорт сохраняет даты из файла, не отключая auto_now_add
+        и auto_now у полей модели, общих для всех потоков."""
+        pub_date = Post._meta.get_field('pub_date')
+        edited = Post._meta.get_field('edited')
+        flags = []
+        execute_sql = SQLInsertCompiler.execute_sql
+
+        def recording_execute_sql(compiler, *args, **kwargs):
+            flags.append((pub_date.auto_now_add, edited.auto_now))
+            return execute_sql(compiler, *args, **kwargs)
+
+        with mock.patch.object(
+                SQLInsertCompiler, 'execute_sql', recording_execute_sql):
+            self.import_records(self.RECORDS)
+        self.assertTrue(flags)
+        self.assertEqual(set(flags), {(True, True)})
+        post = Post.objects.get(text='Второй пост')
+        self.assertEqual(
+            post.pub_date.isoformat(), '2020-01-02T10:00:00+00:00')
+        self.assertEqual(post.edited, post.pub_date)
+
+    def test_export_round_trip(self):
+        """Экспорт в CSV импортируется обратно в другую базу постов."""
+        self.import_records(self.RECORDS)
+        output = StringIO()
+        call_command('export_posts', '-', '--format', 'csv', stdout=output)
+        Post.objects.all().delete()
+        self.import_records(output.getvalue(), '.csv')
+        self.assertEqual(
+            list(Post.objects.values_list('text', 'group__slug')),
+            [('Второй пост', None), ('Первый пост', 'imported')],
+        )
@@ -1,9 +1,19 @@
+import warnings
+from http import HTTPStatus
+from unittest import mock
+
 from django import forms
-from django.test import Client, TestCase
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.base import CacheKeyWarning
+from django.test import Client, RequestFactory, TestCase
 from django.urls import reverse
+from django.utils.http import http_date
 
 from ..constants import POSTS_AMOUNT
-from ..models import Group, Post, User
+from ..models import Follow, Group, Post, TimelineEntry, User
+from ..page_cache import (get_scope_version, page_cache_key,
+                          scope_version_key)
 
 
 class PostPagesTest(TestCase):
@@ -28,6 +38,7 @@ class PostPagesTest(TestCase):
         cls.posts = Post.objects.select_related('author', 'group')
 
     def setUp(self):
+        cache.clear()
         self.user = User.objects.create_user(username='HasNoName')
         self.authorized_client = Client()
         self.authorized_client.force_login(self.user)
@@ -177,6 +188,9 @@ class PaginatorViewTest(TestCase):
         Post.objects.bulk_create(cls.posts)
         cls.posts = Post.objects.select_related('author', 'group')
 
+    def setUp(self):
+        cache.clear()
+
     def test_pages_pagination(self):
         """Проверка правильности вывода количества постов на страницах."""
         pages_with_pagination = {
@@ -196,3 +210,478 @@ class PaginatorViewTest(TestCase):
                 response = self.client.get(address)
                 self.assertEqual(
                     len(response.context['page_obj']), len_posts)
+
+    def test_pages_cursor_pagination(self):
+        """Проверка курсорной пагинации: переходы вперёд и назад."""
+        addresses = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user_author}),
+        ]
+        for address in addresses:
+            with self.subTest(address=address):
+                first_page = self.client.get(
+                    address, {'cursor': ''}).context['page_obj']
+                self.assertEqual(len(first_page), self.first_page_len_posts)
+                self.assertFalse(first_page.has_previous())
+                second_page = self.client.get(
+                    address, {'cursor': first_page.next_cursor}
+                ).context['page_obj']
+                self.assertEqual(
+                    len(second_page), self.second_page_len_posts)
+                self.assertFalse(second_page.has_next())
+                previous_page = self.client.get(
+                    address, {'cursor': second_page.previous_cursor}
+                ).context['page_obj']
+                self.assertEqual(
+                    list(previous_page), list(first_page))
+                self.assertEqual(
+                    list(first_page) + list(second_page),
+                    list(self.posts.order_by('-pub_date', '-id')))
+
+    def test_paginator_count_cache_invalidated(self):
+        """Количество постов берётся из кэша и сбрасывается
+        при создании и удалении поста."""
+        address = reverse('posts:index')
+        response = self.client.get(address)
+        count = response.context['page_obj'].paginator.count
+        self.assertEqual(count, self.posts.count())
+        # Запрос страницы и запрос даты последнего поста для ETag.
+        with self.assertNumQueries(2):
+            self.client.get(address, {'page': 2})
+        post = Post.objects.create(text='Новый пост', author=self.user_author)
+        response = self.client.get(address)
+        self.assertEqual(
+            response.context['page_obj'].paginator.count, count + 1)
+        post.delete()
+        response = self.client.get(address)
+        self.assertEqual(response.context['page_obj'].paginator.count, count)
+
+    def test_paginator_page_window(self):
+        """Паджинатор выводит лишь окно номеров вокруг текущей страницы."""
+        Post.objects.bulk_create([
+            Post(text=f'Текст {i}', author=self.user_author)
+            for i in range(POSTS_AMOUNT * 5)
+        ])
+        response = self.client.get(reverse('posts:index'), {'page': 4})
+        self.assertEqual(
+            list(response.context['page_obj'].page_window), [2, 3, 4, 5, 6])
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user_author = User.objects.create_user(username='TestAuthor')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый текст',
+            author=cls.user_author,
+            group=cls.group,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user_author)
+
+    def test_not_modified(self):
+        """Повторный запрос с ETag страницы получает 304, в том числе
+        из кэша страниц без запросов к базе."""
+        addresses = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user_author}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        )
+        for address in addresses:
+            for client in (self.client, self.authorized_client):
+                with self.subTest(address=address):
+                    etag = client.get(address)['ETag']
+                    response = client.get(address, HTTP_IF_NONE_MATCH=etag)
+                    self.assertEqual(
+                        response.status_code, HTTPStatus.NOT_MODIFIED)
+        etag = self.client.get(reverse('posts:index'))['ETag']
+        with self.assertNumQueries(0):
+            self.client.get(reverse('posts:index'), HTTP_IF_NONE_MATCH=etag)
+
+    def test_etag_changes(self):
+        """ETag зависит от пользователя и меняется при правке поста."""
+        address = reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        etag = self.authorized_client.get(address)['ETag']
+        self.assertNotEqual(self.client.get(address)['ETag'], etag)
+        self.post.text = 'Изменённый текст'
+        self.post.save()
+        response = self.authorized_client.get(
+            address, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, 'Изменённый текст')
+
+    def test_etag_changes_with_author_and_group(self):
+        """ETag лент меняется при смене имени автора и названия
+        группы, которые выводятся на страницах."""
+        addresses = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user_author}),
+        )
+        etags = {
+            address: self.client.get(address)['ETag']
+            for address in addresses
+        }
+        self.user_author.first_name = 'Новое имя'
+        self.user_author.save()
+        self.group.title = 'Новый заголовок'
+        self.group.save()
+        for address, etag in etags.items():
+            with self.subTest(address=address):
+                response = self.client.get(address, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertContains(response, 'Новое имя')
+        version = get_scope_version('index')
+        self.client.force_login(self.user_author)
+        self.assertEqual(get_scope_version('index'), version)
+
+    def test_etag_changes_on_group_delete(self):
+        """После удаления группы сохранённый ETag лент с её постами
+        больше не даёт 304."""
+        group = Group.objects.create(
+            title='Удаляемая группа', slug='deleted-slug')
+        Post.objects.create(
+            text='Пост группы', author=self.user_author, group=group)
+        addresses = (
+            reverse('posts:index'),
+            reverse('posts:profile', kwargs={'username': self.user_author}),
+        )
+        etags = [
+            (client, address, client.get(address)['ETag'])
+            for client in (self.client, self.authorized_client)
+            for address in addresses
+        ]
+        group.delete()
+        for client, address, etag in etags:
+            with self.subTest(address=address):
+                response = client.get(address, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_post_without_last_modified(self):
+        """Страница поста различается по пользователю только ETag,
+        поэтому If-Modified-Since не даёт 304 после входа."""
+        address = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk})
+        response = self.client.get(address)
+        self.assertNotIn('Last-Modified', response)
+        response = self.authorized_client.get(
+            address, HTTP_IF_MODIFIED_SINCE=http_date())
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+
+class PageCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user_author = User.objects.create_user(username='TestAuthor')
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый текст',
+            author=cls.user_author,
+            group=cls.group,
+        )
+        cls.addresses = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile', kwargs={'username': cls.user_author}),
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_anonymous_pages_served_from_cache(self):
+        """Повторный запрос анонима не обращается к базе."""
+        for address in self.addresses:
+            with self.subTest(address=address):
+                content = self.client.get(address).content
+                with self.assertNumQueries(0):
+                    response = self.client.get(address)
+                self.assertEqual(response.content, content)
+
+    def test_cache_invalidated_on_group_delete(self):
+        """Удаление группы сбрасывает кэш страниц с её постами, хотя
+        посты отвязываются от группы без своих сигналов."""
+        group = Group.objects.create(
+            title='Удаляемая группа', slug='deleted-slug')
+        Post.objects.create(
+            text='Пост группы', author=self.user_author, group=group)
+        group_link = reverse(
+            'posts:group_list', kwargs={'slug': group.slug})
+        for address in self.addresses[::2]:
+            self.assertContains(self.client.get(address), group_link)
+        group.delete()
+        for address in self.addresses[::2]:
+            with self.subTest(address=address):
+                self.assertNotContains(self.client.get(address), group_link)
+        self.assertEqual(
+            self.client.get(group_link).status_code, HTTPStatus.NOT_FOUND)
+
+    def test_cache_keys_valid_for_memcached(self):
+        """Ключи кэша страниц допустимы для memcached при любых
+        символах в адресе группы или имени автора."""
+        request = RequestFactory().get('/')
+        for scope in ('group:Тестовый слаг', 'author:имя автора'):
+            with self.subTest(scope=scope), warnings.catch_warnings():
+                warnings.simplefilter('error', CacheKeyWarning)
+                cache.validate_key(scope_version_key(scope))
+                cache.validate_key(page_cache_key(request, scope))
+
+    def test_authorized_pages_not_cached(self):
+        """Авторизованному пользователю страницы рендерятся заново."""
+        self.client.force_login(self.user_author)
+        self.client.get(self.addresses[0])
+        response = self.client.get(self.addresses[0])
+        self.assertIsNotNone(response.context)
+
+    def test_cache_invalidated_on_post_change(self):
+        """Новый пост сбрасывает кэш главной, автора и группы,
+        но не затрагивает другие группы."""
+        other_address = reverse(
+            'posts:group_list', kwargs={'slug': self.other_group.slug})
+        for address in self.addresses + [other_address]:
+            self.client.get(address)
+        Post.objects.create(
+            text='Свежий пост',
+            author=self.user_author,
+            group=self.group,
+        )
+        for address in self.addresses:
+            with self.subTest(address=address):
+                response = self.client.get(address)
+                self.assertContains(response, 'Свежий пост')
+        with self.assertNumQueries(0):
+            self.client.get(other_address)
+
+    def test_post_card_cache_follows_post_and_author_changes(self):
+        """Карточка поста берётся из кэша, пока не изменились
+        пост или имя автора."""
+        self.client.force_login(self.user_author)
+        address = reverse('posts:index')
+        self.client.get(address)
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Отредактированный текст'
+        post.save()
+        self.assertContains(self.client.get(address), post.text)
+        self.user_author.first_name = 'Новое'
+        self.user_author.last_name = 'Имя'
+        self.user_author.save()
+        self.assertContains(self.client.get(address), 'Новое Имя')
+
+
+class SearchViewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user_author = User.objects.create_user(username='TestAuthor')
+        cls.relevant = Post.objects.create(
+            text='Кошки, кошки и ещё раз кошки',
+            author=cls.user_author,
+        )
+        cls.other = Post.objects.create(
+            text='Собаки и одна кошки',
+            author=cls.user_author,
+        )
+        Post.objects.create(text='Про собак', author=cls.user_author)
+
+    def search(self, query, **params):
+        return self.client.get(
+            reverse('posts:search'), {'q': query, **params})
+
+    def test_search_ranks_results(self):
+        """Поиск находит посты и упорядочивает их по релевантности."""
+        response = self.search('кошки')
+        self.assertTemplateUsed(response, 'posts/search.html')
+        self.assertEqual(
+            list(response.context['page_obj']), [self.relevant, self.other])
+
+    def test_search_index_follows_post_changes(self):
+        """Индекс обновляется при изменении и удалении поста."""
+        post = Post.objects.get(pk=self.other.pk)
+        post.text = 'Собаки и попугаи'
+        post.save()
+        self.assertEqual(
+            list(self.search('попугаи').context['page_obj']), [post])
+        self.assertEqual(
+            list(self.search('кошки').context['page_obj']), [self.relevant])
+        post.delete()
+        self.assertEqual(len(self.search('попугаи').context['page_obj']), 0)
+
+    def test_search_ignores_query_syntax(self):
+        """Служебные символы запроса не ломают поиск."""
+        for query in ('', '"', 'кошки OR *', 'NEAR(('):
+            with self.subTest(query=query):
+                response = self.search(query)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_search_paginates_with_query(self):
+        """Ссылки паджинатора сохраняют поисковый запрос."""
+        Post.objects.bulk_create([
+            Post(text=f'Кошки номер {i}', author=self.user_author)
+            for i in range(POSTS_AMOUNT)
+        ])
+        response = self.search('кошки')
+        self.assertContains(
+            response, '?q=%D0%BA%D0%BE%D1%88%D0%BA%D0%B8&amp;page=2')
+        response = self.search('кошки', page=2)
+        self.assertEqual(len(response.context['page_obj']), 2)
+
+
+class FollowViewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='TestAuthor')
+        cls.celebrity = User.objects.create_user(username='Celebrity')
+        cls.follower = User.objects.create_user(username='Follower')
+        cls.stranger = User.objects.create_user(username='Stranger')
+
+    def setUp(self):
+        self.follower_client = Client()
+        self.follower_client.force_login(self.follower)
+        self.stranger_client = Client()
+        self.stranger_client.force_login(self.stranger)
+
+    def follow(self, author):
+        return self.follower_client.get(reverse(
+            'posts:profile_follow', kwargs={'username': author.username}))
+
+    def feed(self, client, cursor=None):
+        params = {'cursor': cursor} if cursor else {}
+        return client.get(
+            reverse('posts:follow_index'), params).context['page_obj']
+
+    def test_follow_and_unfollow(self):
+        """Подписка создаётся и удаляется, на себя подписаться нельзя."""
+        response = self.follow(self.author)
+        self.assertRedirects(response, reverse(
+            'posts:profile', kwargs={'username': self.author.username}))
+        self.assertTrue(Follow.objects.filter(
+            user=self.follower, author=self.author).exists())
+        self.follow(self.follower)
+        self.assertFalse(Follow.objects.filter(
+            user=self.follower, author=self.follower).exists())
+        self.follower_client.get(reverse(
+            'posts:profile_unfollow',
+            kwargs={'username': self.author.username}))
+        self.assertFalse(Follow.objects.filter(
+            user=self.follower, author=self.author).exists())
+
+    def test_follow_pins_client_to_primary(self):
+        """Подписка по GET пишет в базу, поэтому профиль после
+        перенаправления читается из основной базы, а не с реплики."""
+        pin = settings.REPLICA_PIN_COOKIE
+        response = self.follower_client.get(reverse(
+            'posts:profile', kwargs={'username': self.author.username}))
+        self.assertNotIn(pin, response.cookies)
+        self.assertIn(pin, self.follow(self.author).cookies)
+        response = self.follower_client.get(reverse(
+            'posts:profile_unfollow',
+            kwargs={'username': self.author.username}))
+        self.assertIn(pin, response.cookies)
+
+    def test_new_post_fanned_out_to_followers(self):
+        """Новый пост попадает в ленту подписчиков и только в неё."""
+        self.follow(self.author)
+        post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertTrue(TimelineEntry.objects.filter(
+            user=self.follower, post=post).exists())
+        self.assertIn(post, self.feed(self.follower_client))
+        self.assertNotIn(post, self.feed(self.stranger_client))
+        self.follower_client.get(reverse(
+            'posts:profile_unfollow',
+            kwargs={'username': self.author.username}))
+        self.assertNotIn(post, self.feed(self.follower_client))
+
+    def test_follow_backfills_recent_posts(self):
+        """После подписки в ленте появляются прежние посты автора."""
+        post = Post.objects.create(text='Старый пост', author=self.author)
+        self.follow(self.author)
+        self.assertIn(post, self.feed(self.follower_client))
+
+    @mock.patch('posts.timeline.FANOUT_LIMIT', 0)
+    def test_feed_merges_pulled_posts(self):
+        """Посты авторов с большим числом подписчиков не раскладываются
+        по лентам, а подтягиваются при чтении и сливаются с лентой."""
+        self.follow(self.author)
+        self.follow(self.celebrity)
+        posts = []
+        for i in range(POSTS_AMOUNT + 3):
+            author = self.celebrity if i % 2 else self.author
+            posts.append(Post.objects.create(text=f'Пост {i}', author=author))
+        self.assertFalse(TimelineEntry.objects.exists())
+        first_page = self.feed(self.follower_client)
+        second_page = self.feed(
+            self.follower_client, first_page.next_cursor)
+        self.assertEqual(
+            list(first_page) + list(second_page), posts[::-1])
+        previous_page = self.feed(
+            self.follower_client, second_page.previous_cursor)
+        self.assertEqual(list(previous_page), list(first_page))
+
+
+class QueryBudgetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user_author = User.objects.create_user(
+            username='TestAuthor', first_name='Имя', last_name='Фамилия')
+        cls.follower = User.objects.create_user(username='Follower')
+        Follow.objects.create(user=cls.follower, author=cls.user_author)
+        cls.group = Group.objects.create(
+            title='Тестовый заголовок',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        for i in range(POSTS_AMOUNT + 2):
+            cls.post = Post.objects.create(
+                text=f'Тестовый текст {i}',
+                author=cls.user_author,
+                group=cls.group,
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.follower_client = Client()
+        self.follower_client.force_login(self.follower)
+
+    def test_views_fit_query_budget(self):
+        """Полные страницы укладываются в бюджет запросов к базе:
+        при превышении middleware бросает QueryBudgetExceeded."""
+        addresses = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user_author}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+            reverse('posts:follow_index'),
+            reverse('posts:search') + '?q=текст',
+            reverse('posts:post_create'),
+            reverse('about:author'),
+        ]
+        for address in addresses:
+            for client in (self.client, self.follower_client):
+                with self.subTest(address=address):
+                    response = client.get(address)
+                    self.assertLessEqual(
+                        response.query_count,
+                        response.wsgi_request.query_budget or 0,
+                    )
@@ -0,0 +1,171 @@
+import logging
+import queue
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.kvstores.cached_db_kvstore import EMPTY_VALUE, KVStore
+
+from .constants import FEED_THUMBNAIL
+from .models import Post
+from .page_cache import invalidate_scopes, post_scopes
+
+logger = logging.getLogger(__name__)
+
+_state = threading.local()
+
+FEED_THUMBNAIL_OPTIONS = {'crop': 'center', 'upscale': True}
+
+
+class CacheFirstKVStore(KVStore):
+    """
+    Хранилище ключей sorl, которое в потоках запросов читает только
+    кэш: промах не превращается в запрос к таблице thumbnail_kvstore,
+    а ставит миниатюру в очередь. Обработчик очереди читает и базу
+    и возвращает найденные там записи в кэш.
+    """
+
+    def _get_raw(self, key):
+        if getattr(_state, 'in_worker', False):
+            return super()._get_raw(key)
+        value = self.cache.get(key)
+        if value is None or value == EMPTY_VALUE:
+            return None
+        return value
+
+
+class DeferredThumbnailBackend(ThumbnailBackend):
+    """
+    Бэкенд sorl-thumbnail, который не уменьшает изображения в потоке
+    запроса. Готовая миниатюра берётся из хранилища ключей sorl
+    (кэш и таблица thumbnail_kvstore), отсутствующая ставится в очередь
+    фонового обработчика, а get_thumbnail возвращает None: тег
+    {% thumbnail %} в этом случае выводит блок empty.
+    """
+
+    def thumbnail_options(self, source, options):
+        """Параметры миниатюры с умолчаниями, как их дополняет sorl:
+        от них зависит имя файла и ключ в хранилище."""
+        options = dict(options)
+        if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(sorl_settings, attr)
+            if value != getattr(sorl_defaults, attr):
+                options.setdefault(key, value)
+        return options
+
+    def cached_thumbnail(self, file_, geometry_string, **options):
+        """Готовая миниатюра из хранилища ключей или None."""
+        source = ImageFile(file_)
+        name = self._get_thumbnail_filename(
+            source, geometry_string, self.thumbnail_options(source, options))
+        return default.kvstore.get(ImageFile(name, default.storage))
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        if not file_:
+            raise ValueError('falsey file_ argument in get_thumbnail()')
+        thumbnail = self.cached_thumbnail(file_, geometry_string, **options)
+        if thumbnail is None:
+            worker.schedule(file_, geometry_string, options)
+        return thumbnail
+
+    def generate(self, file_, geometry_string, **options):
+        """Создаёт миниатюру; вызывается обработчиком очереди."""
+        return super().get_thumbnail(file_, geometry_string, **options)
+
+
+def invalidate_image_pages(name):
+    """Сбрасывает кэш страниц лент с постами, у которых это изображение,
+    чтобы они вывели готовую миниатюру."""
+    invalidate_scopes(post_scopes(Post.objects.filter(image=name)))
+
+
+def worker_enabled():
+    """Поток обработчика пишет в хранилище ключей sorl в основной базе.
+    Базу в памяти (тесты) он разделяет с потоком запросов и блокирует
+    её таблицы, поэтому для неё задания копятся до вызова drain()."""
+    return settings.THUMBNAIL_WORKER and (
+        not connections[DEFAULT_DB_ALIAS].is_in_memory_db())
+
+
+class ThumbnailWorker:
+    """
+    Очередь заданий на миниатюры и поток, который их выполняет.
+    Задание - имя исходного файла в хранилище, размер и параметры;
+    повторные задания на ещё не готовую миниатюру отбрасываются.
+    Поток запускается при первом задании, см. worker_enabled.
+    """
+
+    def __init__(self):
+        self.jobs = queue.Queue()
+        self.pending = set()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def schedule(self, file_, geometry_string, options):
+        name = getattr(file_, 'name', file_)
+        job = (name, geometry_string, tuple(sorted(options.items())))
+        with self.lock:
+            if job in self.pending:
+                return False
+            self.pending.add(job)
+            if worker_enabled() and (
+                    self.thread is None or not self.thread.is_alive()):
+                self.thread = threading.Thread(
+                    target=self.run, name='thumbnails', daemon=True)
+                self.thread.start()
+        self.jobs.put(job)
+        return True
+
+    def process(self, job):
+        name, geometry_string, options = job
+        _state.in_worker = True
+        try:
+            default.backend.generate(name, geometry_string, **dict(options))
+            invalidate_image_pages(name)
+        except Exception:
+            logger.exception('Thumbnail %s for %s failed',
+                             geometry_string, name)
+        finally:
+            _state.in_worker = False
+            with self.lock:
+                self.pending.discard(job)
+
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            try:
+                self.process(job)
+            finally:
+                close_old_connections()
+                self.jobs.task_done()
+
+    def drain(self):
+        """Выполняет накопленные задания в текущем потоке."""
+        while True:
+            try:
+                job = self.jobs.get_nowait()
+            except queue.Empty:
+                return
+            self.process(job)
+            self.jobs.task_done()
+
+
+worker = ThumbnailWorker()
+
+
+def feed_thumbnail(image):
+    """Миниатюра изображения поста для ленты или None, пока она
+    не готова."""
+    if not image:
+        return None
+    return default.backend.get_thumbnail(
+        image, FEED_THUMBNAIL, **FEED_THUMBNAIL_OPTIONS)
@@ -0,0 +1,94 @@
+from django.db import transaction
+
+from .constants import CURSOR_PREVIOUS, FANOUT_LIMIT, FOLLOW_BACKFILL
+from .models import Follow, Post, TimelineEntry
+from .utils import CursorPaginator
+
+
+def fan_out_post(post):
+    """
+    Раскладывает новый пост по лентам подписчиков автора.
+    Посты авторов, у которых подписчиков больше FANOUT_LIMIT,
+    не раскладываются: лента подтягивает их при чтении. Подписчики
+    читаются одним запросом, не больше FANOUT_LIMIT + 1.
+    """
+    follower_ids = list(Follow.objects.filter(
+        author_id=post.author_id,
+    ).values_list('user_id', flat=True)[:FANOUT_LIMIT + 1])
+    if len(follower_ids) > FANOUT_LIMIT:
+        return
+    with transaction.atomic():
+        TimelineEntry.objects.bulk_create(
+            TimelineEntry(
+                user_id=user_id,
+                post_id=post.pk,
+                author_id=post.author_id,
+                pub_date=post.pub_date,
+            )
+            for user_id in follower_ids
+        )
+        Post.objects.filter(pk=post.pk).update(fanned_out=True)
+    post.fanned_out = True
+
+
+def follow(user, author):
+    """Подписывает пользователя на автора и переносит в его ленту
+    последние разосланные посты автора."""
+    if user == author:
+        return
+    _, created = Follow.objects.get_or_create(user=user, author=author)
+    if not created:
+        return
+    posts = Post.objects.filter(author=author, fanned_out=True).values_list(
+        'pk', 'pub_date')[:FOLLOW_BACKFILL]
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(
+                user=user, post_id=pk, author=author, pub_date=pub_date)
+            for pk, pub_date in posts
+        ),
+        ignore_conflicts=True,
+    )
+
+
+def unfollow(user, author):
+    """Отписывает пользователя от автора и убирает его посты из ленты."""
+    with transaction.atomic():
+        Follow.objects.filter(user=user, author=author).delete()
+        TimelineEntry.objects.filter(user=user, author=author).delete()
+
+
+class TimelinePaginator(CursorPaginator):
+    """
+    Курсорная пагинация ленты подписок. Объединяет материализованную
+    ленту пользователя с неразосланными постами авторов, на которых
+    он подписан (fan-out on read), и сортирует их по (pub_date, id).
+    """
+
+    def __init__(self, user, per_page):
+        super().__init__(None, per_page)
+        self.user = user
+
+    def get_page(self, cursor):
+        direction, position = self.decode_cursor(cursor or '')
+        entries = self.fetch(
+            TimelineEntry.objects.filter(user=self.user).select_related(
+                'post__author', 'post__group'),
+            direction, position, pk_field='post_id',
+        )
+        pulled = self.fetch(
+            Post.objects.filter(
+                fanned_out=False,
+                author__following__user=self.user,
+            ).select_related('author', 'group'),
+            direction, position,
+        )
+        posts = {entry.post_id: entry.post for entry in entries}
+        posts.update((post.pk, post) for post in pulled)
+        posts = sorted(
+            posts.values(),
+            key=lambda post: (post.pub_date, post.pk),
+            reverse=direction != CURSOR_PREVIOUS,
+        )
+        return self.build_page(
+            posts[:self.per_page + 1], direction, position)
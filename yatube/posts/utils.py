@@ -1,12 +1,174 @@
-from django.core.paginator import Paginator
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.encoding import force_bytes
+from django.utils.functional import cached_property
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
 
-from .constants import POSTS_AMOUNT
+from core.timing import record_cache
 
+from .constants import (COUNT_CACHE_TIMEOUT, CURSOR_NEXT, CURSOR_PREVIOUS,
+                        PAGE_WINDOW, POSTS_AMOUNT)
 
-def pagin(request, posts):
-    """ Функция-утилита для деления постов по страницам."""
-    paginator = Paginator(posts, POSTS_AMOUNT)
-    page_number = request.GET.get('page')
-    paginator.get_page(page_number)
 
-    return paginator.get_page(page_number)
+def count_cache_key(key):
+    """Ключ кэша количества постов в ленте (index, group:<id>...)."""
+    return f'posts:count:{key}'
+
+
+class WindowedPage(Page):
+    """Страница, выводящая лишь окно номеров вокруг текущей."""
+
+    @property
+    def page_window(self):
+        first = max(1, self.number - PAGE_WINDOW)
+        last = min(self.paginator.num_pages, self.number + PAGE_WINDOW)
+        return range(first, last + 1)
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Paginator, который хранит количество объектов в кэше по ключу ленты.
+    Ключ сбрасывается сигналами при сохранении и удалении поста.
+    """
+
+    def __init__(self, object_list, per_page, count_key=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_key = count_key
+
+    @cached_property
+    def count(self):
+        if self.count_key is None:
+            return super().count
+        key = count_cache_key(self.count_key)
+        count = cache.get(key)
+        record_cache('count', count is not None)
+        if count is None:
+            count = super().count
+            cache.set(key, count, COUNT_CACHE_TIMEOUT)
+        return count
+
+    def _get_page(self, *args, **kwargs):
+        return WindowedPage(*args, **kwargs)
+
+
+class CursorPage(Page):
+    """
+    Страница курсорной пагинации.
+    Вместо номера страницы хранит курсоры соседних страниц.
+    """
+
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        super().__init__(object_list, None, paginator)
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return '<Cursor page>'
+
+    def has_next(self):
+        return self._has_next and bool(self.object_list)
+
+    def has_previous(self):
+        return self._has_previous and bool(self.object_list)
+
+    @property
+    def next_cursor(self):
+        if not self.has_next():
+            return None
+        return self.paginator.encode_cursor(
+            CURSOR_NEXT, self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous():
+            return None
+        return self.paginator.encode_cursor(
+            CURSOR_PREVIOUS, self.object_list[0])
+
+
+class CursorPaginator:
+    """
+    Курсорная (keyset) пагинация по паре (pub_date, id).
+    Не выполняет COUNT и OFFSET, поэтому стоимость страницы
+    не зависит от её глубины.
+    """
+
+    def __init__(self, object_list, per_page):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+
+    @staticmethod
+    def encode_position(direction, pub_date, pk):
+        value = f'{direction}|{pub_date.isoformat()}|{pk}'
+        return urlsafe_base64_encode(force_bytes(value))
+
+    @staticmethod
+    def encode_cursor(direction, post):
+        return CursorPaginator.encode_position(
+            direction, post.pub_date, post.pk)
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """Возвращает направление и позицию (pub_date, id) курсора.
+        Некорректный курсор ведёт на первую страницу."""
+        try:
+            direction, pub_date, pk = (
+                urlsafe_base64_decode(cursor).decode().split('|'))
+            position = (parse_datetime(pub_date), int(pk))
+        except (TypeError, ValueError, UnicodeDecodeError):
+            return CURSOR_NEXT, None
+        if direction not in (CURSOR_NEXT, CURSOR_PREVIOUS) or (
+                position[0] is None):
+            return CURSOR_NEXT, None
+        return direction, position
+
+    def fetch(self, queryset, direction, position, pk_field='pk'):
+        """
+        Следующие per_page + 1 объектов после позиции в заданном
+        направлении, упорядоченные по (pub_date, pk_field).
+        Лишний объект показывает, есть ли страница дальше.
+        """
+        queryset = queryset.order_by('-pub_date', f'-{pk_field}')
+        if position is not None:
+            pub_date, pk = position
+            if direction == CURSOR_NEXT:
+                queryset = queryset.filter(
+                    Q(pub_date__lt=pub_date)
+                    | Q(pub_date=pub_date, **{f'{pk_field}__lt': pk}))
+            else:
+                queryset = queryset.filter(
+                    Q(pub_date__gt=pub_date)
+                    | Q(pub_date=pub_date, **{f'{pk_field}__gt': pk})
+                ).reverse()
+        return list(queryset[:self.per_page + 1])
+
+    def build_page(self, posts, direction, position):
+        has_more = len(posts) > self.per_page
+        posts = posts[:self.per_page]
+        if direction == CURSOR_PREVIOUS:
+            posts.reverse()
+            return CursorPage(posts, self, True, has_more)
+        return CursorPage(posts, self, has_more, position is not None)
+
+    def get_page(self, cursor):
+        direction, position = self.decode_cursor(cursor or '')
+        posts = self.fetch(self.object_list, direction, position)
+        return self.build_page(posts, direction, position)
+
+
+def pagin(request, posts, count_key=None):
+    """
+    Функция-утилита для деления постов по страницам.
+    count_key - ключ ленты, под которым кэшируется количество постов.
+    """
+    cursor = request.GET.get('cursor')
+    if cursor is not None or settings.POSTS_PAGINATION == 'cursor':
+        return CursorPaginator(posts, POSTS_AMOUNT).get_page(cursor)
+    paginator = CachedCountPaginator(posts, POSTS_AMOUNT, count_key)
+
+    return paginator.get_page(request.GET.get('page'))
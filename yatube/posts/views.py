@@ -1,11 +1,26 @@
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import get_object_or_404, redirect, render
+from django.utils.http import urlencode
 
+from core.middleware import query_budget
+from core.routers import use_replica
+
+from .conditional import (conditional_page, group_validators,
+                          index_validators, post_validators,
+                          profile_validators)
+from .constants import POSTS_AMOUNT
 from .forms import PostForm
-from .models import Group, Post, User
-from .utils import pagin
+from .models import Follow, Group, Post, User, UserPostsCounter
+from .page_cache import cache_anonymous_page
+from .search import SearchResults
+from .timeline import TimelinePaginator, follow, unfollow
+from .utils import CachedCountPaginator, pagin
 
 
+@use_replica
+@cache_anonymous_page(lambda: 'index')
+@conditional_page(index_validators)
+@query_budget(6)
 def index(request):
     """
     Метод, предназначенный для вывода данных при
@@ -15,7 +30,7 @@ def index(request):
         'author',
         'group',
     )
-    page_obj = pagin(request, posts)
+    page_obj = pagin(request, posts, 'index')
     context = {
         'page_obj': page_obj,
     }
@@ -23,6 +38,10 @@ def index(request):
     return render(request, 'posts/index.html', context)
 
 
+@use_replica
+@cache_anonymous_page(lambda slug: f'group:{slug}')
+@conditional_page(group_validators)
+@query_budget(8)
 def group_posts(request, slug):
     """
     Метод, предназначенный для вывода данных при
@@ -33,7 +52,7 @@ def group_posts(request, slug):
         'author',
         'group',
     )
-    page_obj = pagin(request, posts)
+    page_obj = pagin(request, posts, f'group:{group.pk}')
     context = {
         'group': group,
         'page_obj': page_obj,
@@ -42,45 +61,79 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@use_replica
+@cache_anonymous_page(lambda username: f'author:{username}')
+@conditional_page(profile_validators)
+@query_budget(10)
 def profile(request, username):
     """
     Метод, предназначенный для данных
     обо всех записях пользователя.
     """
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(
+        User.objects.select_related('posts_counter'),
+        username=username,
+    )
     posts = author.posts.select_related(
         'author',
         'group',
     )
-    page_obj = pagin(request, posts)
+    page_obj = pagin(request, posts, f'author:{author.pk}')
+    following = request.user.is_authenticated and Follow.objects.filter(
+        user=request.user, author=author).exists()
     context = {
         'author': author,
+        'following': following,
+        'posts_count': UserPostsCounter.get_count(author),
         'page_obj': page_obj,
     }
 
     return render(request, 'posts/profile.html', context)
 
 
+@query_budget(6)
+def search(request):
+    """
+    Метод, предназначенный для полнотекстового поиска по постам.
+    Результаты упорядочены по релевантности.
+    """
+    query = request.GET.get('q', '').strip()
+    paginator = CachedCountPaginator(SearchResults(query), POSTS_AMOUNT)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'page_query': urlencode({'q': query}) + '&',
+    }
+
+    return render(request, 'posts/search.html', context)
+
+
+@use_replica
+@conditional_page(post_validators)
+@query_budget(5)
 def post_detail(request, post_id):
     """
     Метод, предназначенный для данных
     о деталях записи.
     """
     post = get_object_or_404(Post.objects.select_related(
-        'author',
+        'author__posts_counter',
         'group',
     ), id=post_id)
     context = {
         'post': post,
+        'posts_count': UserPostsCounter.get_count(post.author),
     }
 
     return render(request, 'posts/post_detail.html', context)
 
 
 @login_required
+@query_budget(15)
 def post_create(request):
     """Метод, предназначенный создания новой записи."""
-    form = PostForm(request.POST or None)
+    form = PostForm(request.POST or None, files=request.FILES or None)
     if request.method == "POST":
         if form.is_valid():
             post = form.save(commit=False)
@@ -96,6 +149,7 @@ def post_create(request):
 
 
 @login_required
+@query_budget(9)
 def post_edit(request, post_id):
     """Метод, предназначенный редактирования новой записи."""
     post = get_object_or_404(Post.objects.select_related(
@@ -107,7 +161,11 @@ def post_edit(request, post_id):
 
         return redirect('posts:post_detail', post.pk)
 
-    form = PostForm(request.POST or None, instance=post)
+    form = PostForm(
+        request.POST or None,
+        files=request.FILES or None,
+        instance=post,
+    )
     context = {
         'form': form,
         'post': post,
@@ -120,3 +178,39 @@ def post_edit(request, post_id):
     form.save()
 
     return redirect('posts:post_detail', post.pk)
+
+
+@login_required
+@query_budget(5)
+def follow_index(request):
+    """
+    Метод, предназначенный для вывода ленты постов авторов,
+    на которых подписан пользователь.
+    """
+    paginator = TimelinePaginator(request.user, POSTS_AMOUNT)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
+    context = {
+        'page_obj': page_obj,
+    }
+
+    return render(request, 'posts/follow.html', context)
+
+
+@login_required
+@query_budget(10)
+def profile_follow(request, username):
+    """Метод, предназначенный для подписки на автора."""
+    author = get_object_or_404(User, username=username)
+    follow(request.user, author)
+
+    return redirect('posts:profile', username=username)
+
+
+@login_required
+@query_budget(10)
+def profile_unfollow(request, username):
+    """Метод, предназначенный для отписки от автора."""
+    author = get_object_or_404(User, username=username)
+    unfollow(request.user, author)
+
+    return redirect('posts:profile', username=username)
@@ -22,6 +22,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'sorl.thumbnail',
     'core.apps.CoreConfig',
     'posts.apps.PostsConfig',
     'users.apps.UsersConfig',
@@ -29,6 +30,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.ServerTimingMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
+    'core.middleware.QueryBudgetMiddleware',
+    'core.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -44,7 +49,7 @@ TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backend.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -59,16 +64,69 @@ TEMPLATES = [
     },
 ]
 
+# Компилировать все шаблоны при старте WSGI-приложения
+# (имеет смысл с кэширующим загрузчиком, см. settings_production)
+TEMPLATES_WARM_UP = False
+
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        # SQLite с транзакциями BEGIN IMMEDIATE, см. core/backends
+        'ENGINE': 'core.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Соединение возвращается в пул после каждого запроса
+        # и выдаётся следующему запросу любого потока
+        'CONN_MAX_AGE': 0,
+        # Ограниченный пул соединений (core.pool): SIZE соединений на
+        # процесс (не меньше числа потоков сервера), ожидание
+        # свободного до TIMEOUT секунд, закрытие простаивающих дольше
+        # MAX_IDLE секунд
+        'POOL': {'SIZE': 10, 'TIMEOUT': 10, 'MAX_IDLE': 300},
+        # Проверка постоянных соединений (CONN_MAX_AGE > 0)
+        # перед каждым запросом
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# PRAGMA, выполняемые на каждом новом соединении с SQLite
+# (core.signals.configure_sqlite). WAL позволяет читать во время
+# записи, busy_timeout - ждать блокировку вместо ошибки
+# "database is locked", synchronous=NORMAL в режиме WAL не теряет
+# целостность при сбое процесса; cache_size в КиБ при знаке минус.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+# Реплики только для чтения - псевдонимы из DATABASES. Для локальной
+# проверки на файлах SQLite добавьте в DATABASES, например,
+#     'replica': {
+#         'ENGINE': 'core.backends.sqlite3',
+#         'NAME': os.path.join(BASE_DIR, 'db.replica.sqlite3'),
+#         'TEST': {'MIRROR': 'default'},
+#     },
+# перечислите его здесь и копируйте основную базу командой
+# sync_replicas.
+DATABASE_REPLICAS = []
+
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+
+# Приложения, модели которых всегда читаются из основной базы
+PRIMARY_ONLY_APPS = {
+    'auth', 'sessions', 'contenttypes', 'admin', 'thumbnail'}
+
+# После изменяющего запроса клиент читает из основной базы
+# ещё REPLICA_PIN_SECONDS секунд (read-your-writes)
+REPLICA_PIN_COOKIE = 'primary_pin'
+
+REPLICA_PIN_SECONDS = 10
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -101,12 +159,108 @@ STATIC_URL = '/static/'
 
 STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
 
+# Каталог сборки collectstatic
+STATIC_ROOT = os.path.join(BASE_DIR, 'static_root')
+
+# Отдавать STATIC_ROOT самим приложением (core.views.static_file),
+# выбирая сжатые копии файлов; см. settings_production
+STATIC_SERVE = False
+
+# Время кэширования статических файлов без хеша в имени
+STATIC_UNHASHED_MAX_AGE = 60 * 60
+
+MEDIA_URL = '/media/'
+
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Загружаемые файлы пишутся во временный файл частями по мере чтения
+# запроса и затем переносятся в MEDIA_ROOT, не собираясь в памяти
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
+# Миниатюры sorl-thumbnail готовит фоновый обработчик
+# (posts.thumbnails), а не шаблон во время запроса
+THUMBNAIL_BACKEND = 'posts.thumbnails.DeferredThumbnailBackend'
+
+THUMBNAIL_KVSTORE = 'posts.thumbnails.CacheFirstKVStore'
+
+# Запускать поток обработчика миниатюр. При False задания копятся
+# в очереди до вызова posts.thumbnails.worker.drain()
+THUMBNAIL_WORKER = True
+
+# Сессии в кэше с отложенной записью в базу (core.session_backend)
+SESSION_ENGINE = 'core.session_backend'
+
+# Период сброса изменённых сессий в базу, секунды
+SESSION_WRITE_BEHIND_INTERVAL = 5
+
+# Пользователь сессии берётся из кэша (core.auth_backend); запись
+# сбрасывается сигналом при сохранении пользователя. Процессы с
+# LocMemCache не видят сброса друг у друга, поэтому при нескольких
+# процессах нужен общий кэш (Memcached, Redis)
+AUTHENTICATION_BACKENDS = ['core.auth_backend.CachedModelBackend']
+
+USER_CACHE_TIMEOUT = 60 * 5
+
 LOGIN_URL = 'users:login'
 
 LOGIN_REDIRECT_URL = 'posts:index'
 
 # LOGOUT_REDIRECT_URL = 'posts:index'
 
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# Письма ставятся в очередь в каталоге EMAIL_QUEUE_DIR и доставляются
+# обработчиком core.mail.MailWorker через EMAIL_QUEUE_BACKEND
+EMAIL_BACKEND = 'core.mail.QueuedEmailBackend'
+
+EMAIL_QUEUE_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+
+EMAIL_QUEUE_DIR = os.path.join(BASE_DIR, 'mail_spool')
+
+EMAIL_QUEUE_BATCH_SIZE = 50
+
+# Задержки повторных попыток отправки, секунды; после последней
+# письмо переносится в EMAIL_QUEUE_DIR/failed
+EMAIL_QUEUE_RETRY_DELAYS = (60, 5 * 60, 30 * 60, 2 * 60 * 60)
+
+# Разбирать очередь фоновым потоком процесса приложения. При False
+# её разбирает команда send_queued_mail --loop
+EMAIL_QUEUE_WORKER = True
+
+EMAIL_QUEUE_INTERVAL = 5
+
+# Через сколько секунд письмо, забранное остановившимся
+# обработчиком, возвращается в очередь
+EMAIL_QUEUE_CLAIM_TIMEOUT = 10 * 60
 
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+
+# Режим пагинации лент: 'page' - по номерам страниц, 'cursor' - по курсору
+POSTS_PAGINATION = 'page'
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+# Кэш страниц лент для анонимных пользователей. Чтобы хранить
+# страницы в файлах, добавьте в CACHES псевдоним с бэкендом
+# django.core.cache.backends.filebased.FileBasedCache и укажите его здесь.
+PAGE_CACHE_ALIAS = 'default'
+
+PAGE_CACHE_TIMEOUT = 60 * 15
+
+# Превышение бюджета запросов к базе (core.middleware.query_budget):
+# при True - исключение, иначе - предупреждение в лог core.query_budget
+QUERY_BUDGET_STRICT = DEBUG
+
+# Доля запросов, профилируемых core.middleware.ProfilingMiddleware
+# (0 - профилирование выключено), и каталог для профилей
+PROFILING_SAMPLE_RATE = 0
+
+PROFILING_DIR = os.path.join(BASE_DIR, 'profiles')
+
+# Адреса, которым отдаются метрики Prometheus (/metrics/);
+# остальные получают 404
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
@@ -0,0 +1,45 @@
+"""
+Настройки для боевого запуска:
+DJANGO_SETTINGS_MODULE=yatube.settings_production
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import TEMPLATES
+
+DEBUG = False
+
+QUERY_BUDGET_STRICT = False
+
+# Шаблоны компилируются один раз на процесс кэширующим загрузчиком
+# и прогреваются при старте WSGI-приложения (yatube/wsgi.py)
+TEMPLATES = [
+    {
+        **TEMPLATES[0],
+        'APP_DIRS': False,
+        'OPTIONS': {
+            **TEMPLATES[0]['OPTIONS'],
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
+        },
+    },
+]
+
+TEMPLATES_WARM_UP = True
+
+# За обратным прокси все запросы приходят с его адреса, поэтому
+# метрики по умолчанию закрыты; укажите адрес сервера Prometheus
+METRICS_ALLOWED_IPS = []
+
+# collectstatic добавляет к именам файлов хеш содержимого, пишет
+# manifest и сжатые копии .gz и .br (с пакетом Brotli)
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+
+STATIC_SERVE = True
+
+# Письма доставляет отдельный процесс: manage.py send_queued_mail --loop
+EMAIL_QUEUE_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+
+EMAIL_QUEUE_WORKER = False
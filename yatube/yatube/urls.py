@@ -1,10 +1,28 @@
+import re
+
+from django.conf import settings
+from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
+
+from core.views import metrics_view, static_file
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics/', metrics_view, name='metrics'),
     path('about/', include('about.urls', namespace='about')),
     path('auth/', include('users.urls', namespace='users')),
     path('auth/', include('django.contrib.auth.urls')),
     path('', include('posts.urls', namespace='posts')),
 ]
+
+if settings.STATIC_SERVE:
+    urlpatterns.insert(0, re_path(
+        r'^{}(?P<path>.+)$'.format(re.escape(settings.STATIC_URL[1:])),
+        static_file,
+        name='static',
+    ))
+
+if settings.DEBUG:
+    urlpatterns += static(
+        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
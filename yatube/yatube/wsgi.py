@@ -5,3 +5,15 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+
+def warm_up():
+    from django.conf import settings
+
+    if settings.TEMPLATES_WARM_UP:
+        from core.template_backend import warm_templates
+
+        warm_templates()
+
+
+warm_up()